@@ -6,8 +6,8 @@ Provides CRUD operations for user-created annotations on PDF documents.
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import BaseModel, Field, TypeAdapter
 
 from paperreader.api.dependencies import require_user_id
 from paperreader.services.annotations.repository import (
@@ -67,6 +67,10 @@ class AnnotationResponse(BaseModel):
     updated_at: str
 
 
+# Built once; constructing a TypeAdapter compiles a new validator/serializer
+_ANNOTATION_LIST_ADAPTER = TypeAdapter(List[AnnotationResponse])
+
+
 # ==================== API Routes ====================
 
 @router.post("", response_model=dict)
@@ -139,7 +143,11 @@ async def list_annotations(
             if "updated_at" in ann and hasattr(ann["updated_at"], "isoformat"):
                 ann["updated_at"] = ann["updated_at"].isoformat()
         
-        return annotations
+        payload = _ANNOTATION_LIST_ADAPTER.validate_python(annotations)
+        return Response(
+            content=_ANNOTATION_LIST_ADAPTER.dump_json(payload),
+            media_type="application/json",
+        )
     except Exception as e:
         print(f"[AnnotationAPI] Error listing annotations: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to list annotations: {str(e)}")
@@ -5,10 +5,10 @@ import logging
 import mimetypes
 import os
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Response
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
@@ -16,10 +16,12 @@ logger = logging.getLogger(__name__)
 from paperreader.services.chat.chat_service import chat_service
 from paperreader.services.chat import repository as chat_repository
 from paperreader.models.chat import (
+    ChatMessage,
     ChatSessionCreate,
     ChatMessageCreate,
     ChatSessionResponse,
     ChatMessageResponse,
+    CHAT_SESSION_ADAPTER,
 )
 from paperreader.services.qa.generators import get_generator
 from paperreader.services.qa.embeddings import get_embedder
@@ -32,6 +34,71 @@ from paperreader.services.documents import repository as documents_repository
 
 router = APIRouter()
 MINIO_CHAT_BUCKET = os.getenv("MINIO_CHAT_BUCKET", "chat-images")
+# Number of recent messages passed to the generator as conversation context
+CHAT_HISTORY_LIMIT = 10
+
+# System prompts are constant apart from the per-document metadata block,
+# which is spliced in between the shared intro and the endpoint's rules.
+_SYSTEM_PROMPT_INTRO = (
+    "You are a helpful assistant that answers questions using chat history, images, and document context."
+)
+_ASK_SYSTEM_PROMPT_RULES = (
+    "\n\nCRITICAL: You MUST use the chat history provided below to answer questions about previous conversations."
+    "\nWhen the user asks questions about previous messages or conversation history, you MUST review the chat history "
+    "and provide a clear summary of ALL previous questions and answers."
+    "\n\nPRIORITY ORDER:"
+    "\n1. CHAT HISTORY FIRST: For ANY question about previous messages or conversation history, you MUST check and summarize the chat history provided below. "
+    "List all previous user questions and your corresponding answers clearly. DO NOT include the current question in your summary."
+    "\n2. Analyze user-uploaded images directly for image questions."
+    "\n3. Use provided document context only to support explanations."
+    "\n\nRULES:"
+    "\n- For simple greetings or casual conversation (e.g., 'hi', 'hello', 'thanks'), respond briefly and naturally WITHOUT using document context. Keep it short and friendly."
+    "\n- For questions that don't require document knowledge (greetings, casual chat, general questions), answer directly without referencing document contexts."
+    "\n- ONLY use document contexts when the question is about the document content, research topics, or requires specific information from the document."
+    "\n- NEVER ignore chat history when asked about previous messages or conversation history. The chat history below contains ALL previous messages."
+    "\n- When summarizing previous messages, be specific: mention what was asked and what was answered."
+    "\n- CRITICAL: When asked about previous messages or conversation history, summarize ONLY the messages that came BEFORE the current question. Do NOT include the current question in your summary."
+    "\n- If you reference citations [cN] from previous answers, use those exact citation numbers as they appeared in the previous answer."
+    "\n- Never quote raw document text when answering."
+    "\n- Focus on what is visible in images for image-related queries."
+    "\n- Be concise and factual. Add [cN] markers ONLY when referencing document context."
+    "\n\nFORMATTING (IMPORTANT):"
+    "\n- Format your response using Markdown for better readability:"
+    "\n  * Use **bold** for important terms, author names, and key concepts"
+    "\n  * Use *italic* or `backticks` for document titles, paper names, and technical terms"
+    "\n  * Use proper markdown lists (bullets or numbered) when listing multiple items"
+    "\n  * Keep citations [cN] clearly visible and properly formatted"
+    "\n- Example format: The authors of the document *\"CiteRead: Integrating Localized Citation Contexts into Scientific Paper Reading\"* are **Napol Rachatasumrit**, **Jonathan Bragg**, **Amy X. Zhang**, and **Daniel S. Weld** [c1]."
+    "\n- At the end of your answer, provide a confidence score (0.0-1.0) based on how well the provided document context supports your answer. Format: [CONFIDENCE:0.85]"
+)
+
+_UPLOAD_SYSTEM_PROMPT_RULES = (
+    "\n\nCRITICAL: You MUST use the chat history provided below to answer questions about previous conversations."
+    "\nWhen the user asks 'What did I ask before?', 'What were my previous questions?', 'What did we discuss?', "
+    "or similar questions, you MUST review the chat history and provide a clear summary of ALL previous questions and answers."
+    "\n\nPRIORITY ORDER:"
+    "\n1. CHAT HISTORY FIRST: For ANY question about previous messages, you MUST check and summarize the chat history provided below. "
+    "List all previous user questions and your corresponding answers clearly."
+    "\n2. Analyze user-uploaded images directly for image questions."
+    "\n3. Use provided document context only to support explanations."
+    "\n\nRULES:"
+    "\n- For simple greetings or casual conversation (e.g., 'hi', 'hello', 'thanks'), respond briefly and naturally WITHOUT using document context. Keep it short and friendly."
+    "\n- For questions that don't require document knowledge (greetings, casual chat, general questions), answer directly without referencing document contexts."
+    "\n- ONLY use document contexts when the question is about the document content, research topics, or requires specific information from the document."
+    "\n- NEVER ignore chat history when asked about previous questions. The chat history below contains ALL previous messages."
+    "\n- When summarizing previous questions, be specific: mention what was asked and what was answered."
+    "\n- Never quote raw document text when answering."
+    "\n- Focus on what is visible in images for image-related queries."
+    "\n- Be concise and factual. Add [cN] markers ONLY when referencing document context."
+    "\n\nFORMATTING (IMPORTANT):"
+    "\n- Format your response using Markdown for better readability:"
+    "\n  * Use **bold** for important terms, author names, and key concepts"
+    "\n  * Use *italic* or `backticks` for document titles, paper names, and technical terms"
+    "\n  * Use proper markdown lists (bullets or numbered) when listing multiple items"
+    "\n  * Keep citations [cN] clearly visible and properly formatted"
+    "\n- Example format: The authors of the document *\"CiteRead: Integrating Localized Citation Contexts into Scientific Paper Reading\"* are **Napol Rachatasumrit**, **Jonathan Bragg**, **Amy X. Zhang**, and **Daniel S. Weld** [c1]."
+    "\n- At the end of your answer, provide a confidence score (0.0-1.0) based on how well the provided document context supports your answer. Format: [CONFIDENCE:0.85]"
+)
 
 
 def _normalise_document_id_value(value: Optional[Any]) -> Optional[str]:
@@ -44,6 +111,11 @@ def _normalise_document_id_value(value: Optional[Any]) -> Optional[str]:
     return text
 
 
+def _json_response(payload: bytes) -> Response:
+    """Wrap pre-serialized JSON bytes, bypassing FastAPI's jsonable_encoder pass."""
+    return Response(content=payload, media_type="application/json")
+
+
 def _ensure_dict(value: Any) -> Dict[str, Any]:
     """Best-effort conversion of metadata-like objects into dictionaries."""
     if isinstance(value, dict):
@@ -124,14 +196,14 @@ async def _get_document_metadata_info(session_metadata: Optional[Dict[str, Any]]
                             "mentioned in the document content. The metadata above refers to THIS document, not other papers."
                         )
                         prefix_msg = f" ({debug_prefix})" if debug_prefix else ""
-                        print(f"[DEBUG] ✅ Added document metadata to prompt{prefix_msg}: title={title[:50] if title else 'N/A'}, author={author[:50] if author else 'N/A'}")
+                        logger.debug("✅ Added document metadata to prompt%s: title=%s, author=%s", prefix_msg, title[:50] if title else 'N/A', author[:50] if author else 'N/A')
             except Exception as e:
                 prefix_msg = f" ({debug_prefix})" if debug_prefix else ""
-                print(f"[DEBUG] ⚠️ Failed to load document metadata{prefix_msg}: {e}")
+                logger.debug("⚠️ Failed to load document metadata%s: %s", prefix_msg, e)
                 # Continue without metadata if there's an error
     except Exception as e:
         prefix_msg = f" ({debug_prefix})" if debug_prefix else ""
-        print(f"[DEBUG] ⚠️ Error getting document metadata{prefix_msg}: {e}")
+        logger.debug("⚠️ Error getting document metadata%s: %s", prefix_msg, e)
         # Continue without metadata if there's an error
     
     return document_metadata_info
@@ -194,9 +266,8 @@ async def _ensure_chat_session(
             user_id=user_id,
         )
         if existing_session:
-            response = await chat_service.get_session_response(existing_session.session_id)
-            if response:
-                return response
+            # find_session_by_document already loaded the full session
+            return chat_service.to_session_response(existing_session)
 
     session_id = str(uuid.uuid4())
     session_data = ChatSessionCreate(
@@ -205,11 +276,8 @@ async def _ensure_chat_session(
         initial_message=initial_message,
         metadata=merged_metadata,
     )
-    await chat_service.create_session(session_data)
-    response = await chat_service.get_session_response(session_id)
-    if response is None:
-        raise RuntimeError("Session creation failed")
-    return response
+    session = await chat_service.create_session(session_data)
+    return chat_service.to_session_response(session)
 
 
 async def _store_user_images(session_id: str, images: Optional[List[str]]) -> List[str]:
@@ -234,7 +302,7 @@ async def _store_user_images(session_id: str, images: Optional[List[str]]) -> Li
                 )
                 stored.append(object_name)
             except Exception as exc:
-                print(f"[Chat] ⚠️ Failed to store user image: {exc}")
+                logger.warning("Failed to store user image: %s", exc)
         else:
             stored.append(image)
     return stored
@@ -270,6 +338,9 @@ class ChatSessionCreateRequest(BaseModel):
 class ChatSessionListResponse(BaseModel):
     sessions: List[ChatSessionResponse]
 
+class ChatMessageListResponse(BaseModel):
+    messages: List[ChatMessage]
+
 @router.post("/sessions", response_model=ChatSessionResponse)
 async def create_chat_session(request: ChatSessionCreateRequest):
     """Create a new chat session or return existing one if found."""
@@ -278,13 +349,14 @@ async def create_chat_session(request: ChatSessionCreateRequest):
         if request.tab_id:
             metadata["tab_id"] = request.tab_id
 
-        return await _ensure_chat_session(
+        response = await _ensure_chat_session(
             document_id=request.document_id,
             user_id=request.user_id,
             metadata=metadata,
             force_new=bool(request.force_new),
             initial_message=request.initial_message,
         )
+        return _json_response(CHAT_SESSION_ADAPTER.dump_json(response))
     except HTTPException:
         raise
     except Exception as e:
@@ -304,13 +376,14 @@ async def get_or_create_chat_session_by_document(
         if tab_id:
             metadata["tab_id"] = tab_id
 
-        return await _ensure_chat_session(
+        response = await _ensure_chat_session(
             document_id=document_id,
             user_id=user_id,
             metadata=metadata,
             force_new=force_new,
             initial_message=None,
         )
+        return _json_response(CHAT_SESSION_ADAPTER.dump_json(response))
     except HTTPException:
         raise
     except Exception as e:
@@ -323,12 +396,29 @@ async def get_chat_session(session_id: str):
         session = await chat_service.get_session_response(session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
-        return session
+        return _json_response(CHAT_SESSION_ADAPTER.dump_json(session))
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/sessions/{session_id}/messages", response_model=ChatMessageListResponse)
+async def get_chat_session_messages(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[datetime] = Query(None),
+):
+    """Page through a session's history, newest page first.
+
+    Returns up to ``limit`` messages created before ``before`` (oldest first);
+    pass the timestamp of the oldest returned message to load the page before it.
+    """
+    try:
+        messages = await chat_service.get_session_messages(session_id, limit, before)
+        return _json_response(ChatMessageListResponse(messages=messages).model_dump_json())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/sessions", response_model=ChatSessionListResponse)
 async def list_chat_sessions(user_id: Optional[str] = None, limit: int = 20):
     """List chat sessions for a user"""
@@ -337,7 +427,7 @@ async def list_chat_sessions(user_id: Optional[str] = None, limit: int = 20):
             raise HTTPException(status_code=400, detail="user_id is required")
         
         sessions = await chat_service.list_user_sessions(user_id, limit)
-        return ChatSessionListResponse(sessions=sessions)
+        return _json_response(ChatSessionListResponse(sessions=sessions).model_dump_json())
     except HTTPException:
         raise
     except Exception as e:
@@ -359,18 +449,31 @@ async def delete_sessions_for_document(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.delete("/sessions/stale")
+async def purge_stale_chat_sessions(
+    user_id: Optional[str] = Query(None),
+    older_than_days: int = Query(30, ge=1),
+):
+    """Delete a user's chat sessions that have not been updated for ``older_than_days`` days."""
+    if not user_id:
+        raise HTTPException(status_code=400, detail="user_id is required")
+    try:
+        deleted = await chat_service.purge_user_sessions(user_id, older_than_days)
+        return {"deleted": deleted}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/ask", response_model=ChatAskResponse)
 async def ask_question(request: ChatAskRequest):
     """Ask a question in a chat session"""
-    print(f"[DEBUG] ===== CHAT ROUTE CALLED =====")
-    print(f"[DEBUG] Session ID (UUID): {request.session_id}")
-    print(f"[DEBUG] Session ID type: {type(request.session_id).__name__}, length: {len(request.session_id)}")
-    print(f"[DEBUG] Question: {request.question}")
-    print(f"[DEBUG] User images: {request.user_images}")
-    print(f"[DEBUG] ==============================")
+    logger.debug("Session ID (UUID): %s", request.session_id)
+    logger.debug("Session ID type: %s, length: %s", type(request.session_id).__name__, len(request.session_id))
+    logger.debug("Question: %s", request.question)
+    logger.debug("User images: %s", request.user_images)
     try:
-        # Get or create session
-        session = await chat_service.get_session(request.session_id)
+        # Load the session header together with the recent history used as
+        # context, instead of materializing every stored message.
+        session = await chat_service.get_session_tail(request.session_id, CHAT_HISTORY_LIMIT)
         created_metadata: Dict[str, Any] = {}
         if not session:
             raise HTTPException(
@@ -381,35 +484,31 @@ async def ask_question(request: ChatAskRequest):
                 ),
             )
         else:
-            print(f"[LOG] ✅ Found existing session: {request.session_id}")
-            print(f"[LOG] Session has {len(session.messages) if session.messages else 0} existing messages")
+            logger.debug("✅ Found existing session: %s", request.session_id)
         
         # Get document metadata to add to prompt
         document_metadata_info = await _get_document_metadata_info(session.metadata)
         
         # Get recent chat history for context (last 10 messages for better context)
         # CRITICAL: Verify we're using the correct session_id
-        print(f"[DEBUG] ===== RETRIEVING CHAT HISTORY =====")
-        print(f"[DEBUG] Request session_id: {request.session_id}")
-        print(f"[DEBUG] Session from DB has {len(session.messages) if session.messages else 0} messages")
-        print(f"[DEBUG] Session ID from DB: {session.session_id if hasattr(session, 'session_id') else 'N/A'}")
+        logger.debug("Request session_id: %s", request.session_id)
+        logger.debug("Session ID from DB: %s", session.session_id if hasattr(session, 'session_id') else 'N/A')
         
         # Verify session_id matches
         if hasattr(session, 'session_id') and session.session_id != request.session_id:
-            print(f"[ERROR] ❌ SESSION ID MISMATCH!")
-            print(f"[ERROR] Request session_id: {request.session_id}")
-            print(f"[ERROR] DB session_id: {session.session_id}")
+            logger.error("❌ SESSION ID MISMATCH!")
+            logger.error("Request session_id: %s", request.session_id)
+            logger.error("DB session_id: %s", session.session_id)
             raise HTTPException(status_code=500, detail="Session ID mismatch detected")
         
-        chat_history = await chat_service.get_recent_messages(request.session_id, limit=10)
+        chat_history = session.messages
         
-        # Debug: Print chat history retrieved
-        print(f"[DEBUG] ===== CHAT HISTORY RETRIEVED =====")
-        print(f"[DEBUG] Retrieved {len(chat_history)} messages from database for session_id: {request.session_id}")
-        for i, msg in enumerate(chat_history):
-            content_preview = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
-            print(f"[DEBUG] Message {i+1}: {msg.role} - {content_preview}")
-        print(f"[DEBUG] ================================")
+        # Debug: Print chat history retrieved (previews are only built when DEBUG is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Retrieved %s messages from database for session_id: %s", len(chat_history), request.session_id)
+            for i, msg in enumerate(chat_history):
+                content_preview = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
+                logger.debug("Message %s: %s - %s", i+1, msg.role, content_preview)
         
         # No more embedding search - just use recent chat history
         
@@ -418,37 +517,7 @@ async def ask_question(request: ChatAskRequest):
         
         # Add system prompt (not saved in DB, added dynamically here)
         # STRONGER PROMPT for chat history usage
-        system_prompt = (
-            "You are a helpful assistant that answers questions using chat history, images, and document context."
-            + document_metadata_info +  # Add document metadata here
-            "\n\nCRITICAL: You MUST use the chat history provided below to answer questions about previous conversations."
-            "\nWhen the user asks questions about previous messages or conversation history, you MUST review the chat history "
-            "and provide a clear summary of ALL previous questions and answers."
-            "\n\nPRIORITY ORDER:"
-            "\n1. CHAT HISTORY FIRST: For ANY question about previous messages or conversation history, you MUST check and summarize the chat history provided below. "
-            "List all previous user questions and your corresponding answers clearly. DO NOT include the current question in your summary."
-            "\n2. Analyze user-uploaded images directly for image questions."
-            "\n3. Use provided document context only to support explanations."
-            "\n\nRULES:"
-            "\n- For simple greetings or casual conversation (e.g., 'hi', 'hello', 'thanks'), respond briefly and naturally WITHOUT using document context. Keep it short and friendly."
-            "\n- For questions that don't require document knowledge (greetings, casual chat, general questions), answer directly without referencing document contexts."
-            "\n- ONLY use document contexts when the question is about the document content, research topics, or requires specific information from the document."
-            "\n- NEVER ignore chat history when asked about previous messages or conversation history. The chat history below contains ALL previous messages."
-            "\n- When summarizing previous messages, be specific: mention what was asked and what was answered."
-            "\n- CRITICAL: When asked about previous messages or conversation history, summarize ONLY the messages that came BEFORE the current question. Do NOT include the current question in your summary."
-            "\n- If you reference citations [cN] from previous answers, use those exact citation numbers as they appeared in the previous answer."
-            "\n- Never quote raw document text when answering."
-            "\n- Focus on what is visible in images for image-related queries."
-            "\n- Be concise and factual. Add [cN] markers ONLY when referencing document context."
-            "\n\nFORMATTING (IMPORTANT):"
-            "\n- Format your response using Markdown for better readability:"
-            "\n  * Use **bold** for important terms, author names, and key concepts"
-            "\n  * Use *italic* or `backticks` for document titles, paper names, and technical terms"
-            "\n  * Use proper markdown lists (bullets or numbered) when listing multiple items"
-            "\n  * Keep citations [cN] clearly visible and properly formatted"
-            "\n- Example format: The authors of the document *\"CiteRead: Integrating Localized Citation Contexts into Scientific Paper Reading\"* are **Napol Rachatasumrit**, **Jonathan Bragg**, **Amy X. Zhang**, and **Daniel S. Weld** [c1]."
-            "\n- At the end of your answer, provide a confidence score (0.0-1.0) based on how well the provided document context supports your answer. Format: [CONFIDENCE:0.85]"
-        )
+        system_prompt = _SYSTEM_PROMPT_INTRO + document_metadata_info + _ASK_SYSTEM_PROMPT_RULES
         history_for_generator.append({
             "role": "system",
             "content": system_prompt,
@@ -460,17 +529,17 @@ async def ask_question(request: ChatAskRequest):
         # CRITICAL: Filter out current question from history to avoid confusion (shouldn't be there, but double-check for race conditions)
         current_question = request.question.strip()
         if chat_history and len(chat_history) > 0:
-            print(f"[DEBUG] Adding {len(chat_history)} messages from chat history to generator")
+            logger.debug("Adding %s messages from chat history to generator", len(chat_history))
             filtered_count = 0
             for msg in chat_history:
                 # Skip system messages (shouldn't be in DB, but double-check)
                 if msg.role == "system":
-                    print(f"[DEBUG] ⚠️ WARNING: System message found in DB chat_history, skipping")
+                    logger.debug("⚠️ WARNING: System message found in DB chat_history, skipping")
                     continue
                 # CRITICAL: Exclude current question from history to prevent model confusion
                 # If somehow current question is already in history (race condition), skip it
                 if msg.role == "user" and msg.content.strip() == current_question:
-                    print(f"[DEBUG] ⚠️ WARNING: Current question found in chat_history, excluding it (this shouldn't happen normally)")
+                    logger.debug("⚠️ WARNING: Current question found in chat_history, excluding it (this shouldn't happen normally)")
                     filtered_count += 1
                     continue
                 history_for_generator.append({
@@ -479,39 +548,38 @@ async def ask_question(request: ChatAskRequest):
                     "metadata": msg.metadata or {}
                 })
             if filtered_count > 0:
-                print(f"[DEBUG] ⚠️ Filtered out {filtered_count} message(s) that matched current question")
-            print(f"[DEBUG] ✅ Added messages to history_for_generator. Total now: {len(history_for_generator)}")
+                logger.debug("⚠️ Filtered out %s message(s) that matched current question", filtered_count)
+            logger.debug("✅ Added messages to history_for_generator. Total now: %s", len(history_for_generator))
         else:
-            print(f"[DEBUG] ⚠️ No chat history messages to add (empty or None). Only system prompt will be used.")
+            logger.debug("⚠️ No chat history messages to add (empty or None). Only system prompt will be used.")
         
         # Debug: Count messages by role to confirm assistant messages are included
-        user_count = sum(1 for msg in history_for_generator if msg.get("role") == "user")
-        assistant_count = sum(1 for msg in history_for_generator if msg.get("role") == "assistant")
-        system_count = sum(1 for msg in history_for_generator if msg.get("role") == "system")
-        print(f"[DEBUG] ===== CHAT HISTORY PREPARED FOR GENERATOR =====")
-        print(f"[DEBUG] Total messages: {len(history_for_generator)}")
-        print(f"[DEBUG]   - System messages: {system_count}")
-        print(f"[DEBUG]   - User messages: {user_count}")
-        print(f"[DEBUG]   - Assistant messages (OpenAI responses): {assistant_count}")
-        if user_count > 0 or assistant_count > 0:
-            print(f"[DEBUG] ✅ Chat history will be passed to OpenAI")
-            # Show preview of first few messages
-            for i, msg in enumerate(history_for_generator[:5]):
-                role = msg.get("role")
-                content_preview = msg.get("content", "")[:80] + "..." if len(msg.get("content", "")) > 80 else msg.get("content", "")
-                print(f"[DEBUG]   [{i+1}] {role}: {content_preview}")
-        else:
-            print(f"[DEBUG] ⚠️ WARNING: No user/assistant messages in history - this is a new conversation")
-        print(f"[DEBUG] ===============================================")
+        if logger.isEnabledFor(logging.DEBUG):
+            user_count = sum(1 for msg in history_for_generator if msg.get("role") == "user")
+            assistant_count = sum(1 for msg in history_for_generator if msg.get("role") == "assistant")
+            system_count = sum(1 for msg in history_for_generator if msg.get("role") == "system")
+            logger.debug("Total messages: %s", len(history_for_generator))
+            logger.debug("- System messages: %s", system_count)
+            logger.debug("- User messages: %s", user_count)
+            logger.debug("- Assistant messages (OpenAI responses): %s", assistant_count)
+            if user_count > 0 or assistant_count > 0:
+                logger.debug("✅ Chat history will be passed to OpenAI")
+                # Show preview of first few messages
+                for i, msg in enumerate(history_for_generator[:5]):
+                    role = msg.get("role")
+                    content_preview = msg.get("content", "")[:80] + "..." if len(msg.get("content", "")) > 80 else msg.get("content", "")
+                    logger.debug("[%s] %s: %s", i+1, role, content_preview)
+            else:
+                logger.debug("⚠️ WARNING: No user/assistant messages in history - this is a new conversation")
         
-        history_payload_preview = [
-            {
-                "role": msg.get("role"),
-                "content": (msg.get("content") or "")[:120],
-            }
-            for msg in history_for_generator
-        ]
-        print(f"[DEBUG] History payload preview (trimmed): {history_payload_preview}")
+            history_payload_preview = [
+                {
+                    "role": msg.get("role"),
+                    "content": (msg.get("content") or "")[:120],
+                }
+                for msg in history_for_generator
+            ]
+            logger.debug("History payload preview (trimmed): %s", history_payload_preview)
         
         # Extract images from chat history for comparison
         history_images = []
@@ -548,14 +616,14 @@ async def ask_question(request: ChatAskRequest):
                                 b64 = base64.b64encode(img_bytes).decode("ascii")
                                 data_url = f"data:{mime};base64,{b64}"
                                 history_base64_images.append(data_url)
-                                print(f"[DEBUG] History image {img} -> base64")
+                                logger.debug("History image %s -> base64", img)
                             else:
-                                print(f"[WARNING] History image file not found: {img}")
+                                logger.warning("History image file not found: %s", img)
                         except Exception as e:
-                            print(f"[WARNING] Failed to process history image {img}: {e}")
+                            logger.warning("Failed to process history image %s: %s", img, e)
         
-        print(f"[DEBUG] Chat history for generator: {len(history_for_generator)} messages")
-        print(f"[DEBUG] Found {len(history_base64_images)} images from chat history")
+        logger.debug("Chat history for generator: %s messages", len(history_for_generator))
+        logger.debug("Found %s images from chat history", len(history_base64_images))
         
         # Process user images - keep file paths for database, convert to base64 only for OpenAI
         processed_user_images = []
@@ -597,25 +665,23 @@ async def ask_question(request: ChatAskRequest):
                                 b64 = base64.b64encode(img_bytes).decode("ascii")
                                 data_url = f"data:{mime};base64,{b64}"
                                 base64_images_for_openai.append(data_url)
-                                print(f"[DEBUG] Image {img_path} -> base64 for OpenAI")
+                                logger.debug("Image %s -> base64 for OpenAI", img_path)
                             else:
-                                print(f"[WARNING] Image file not found: {img_path}")
+                                logger.warning("Image file not found: %s", img_path)
                         except Exception as e:
-                            print(f"[WARNING] Failed to process image {img_path}: {e}")
+                            logger.warning("Failed to process image %s: %s", img_path, e)
                 else:
-                    print(f"[WARNING] Invalid image data type: {type(img_path)}")
+                    logger.warning("Invalid image data type: %s", type(img_path))
         
         # Combine current images with history images for comparison
         all_user_images = processed_user_images + history_images
         all_base64_images = base64_images_for_openai + history_base64_images
         
-        print(f"[DEBUG] ===== IMAGE PROCESSING =====")
-        print(f"[DEBUG] Processed user images (file paths): {len(processed_user_images)}")
-        print(f"[DEBUG] Base64 images for OpenAI: {len(base64_images_for_openai)}")
-        print(f"[DEBUG] History base64 images: {len(history_base64_images)}")
-        print(f"[DEBUG] Total images for comparison: {len(all_user_images)}")
-        print(f"[DEBUG] Total base64 images: {len(all_base64_images)}")
-        print(f"[DEBUG] ============================")
+        logger.debug("Processed user images (file paths): %s", len(processed_user_images))
+        logger.debug("Base64 images for OpenAI: %s", len(base64_images_for_openai))
+        logger.debug("History base64 images: %s", len(history_base64_images))
+        logger.debug("Total images for comparison: %s", len(all_user_images))
+        logger.debug("Total base64 images: %s", len(all_base64_images))
         
         # Prepare user message payload (persist after successful inference)
         user_message = ChatMessageCreate(
@@ -628,8 +694,8 @@ async def ask_question(request: ChatAskRequest):
         
         # No more embedding - just save to chat history (after inference)
         
-        # Get session to extract identifiers
-        session = await chat_service.get_session(request.session_id)
+        # Reuse the session loaded above to extract identifiers; nothing has
+        # been written since, so re-reading it would only cost a round trip.
         document_id = None
         session_metadata: Dict[str, Any] = _ensure_dict(getattr(session, "metadata", None) or created_metadata)
 
@@ -662,7 +728,7 @@ async def ask_question(request: ChatAskRequest):
         if metadata_changed:
             await chat_repository.update_session_metadata(request.session_id, updated_metadata)
             session_metadata = updated_metadata
-            print(f"[DEBUG] Updated session metadata with canonical document info: {updated_metadata}")
+            logger.debug("Updated session metadata with canonical document info: %s", updated_metadata)
 
         # Configure and get cached QA pipeline (reuses chunks and embeddings)
         config = PipelineConfig(
@@ -674,15 +740,15 @@ async def ask_question(request: ChatAskRequest):
         )
         
         # Use cached pipeline - only rebuilds when PDFs change
-        print(f"[DEBUG] Getting pipeline for question: {request.question[:50]}... (document_id: {document_id})")
+        logger.debug("Getting pipeline for question: %s... (document_id: %s)", request.question[:50], document_id)
         pipeline = await get_pipeline(config, pdf_name=None, document_id=document_id)
         if pipeline is None:
-            print(f"[ERROR] get_pipeline() returned None - this should not happen!")
+            logger.error("get_pipeline() returned None - this should not happen!")
             raise HTTPException(
                 status_code=500,
                 detail="Failed to initialize pipeline. Please check the backend logs and ensure the document is properly processed."
             )
-        print(f"[DEBUG] Pipeline retrieved, calling answer()")
+        logger.debug("Pipeline retrieved, calling answer()")
         
         result = await pipeline.answer(
             question=request.question,
@@ -692,23 +758,14 @@ async def ask_question(request: ChatAskRequest):
         
         # Validate result is not None
         if result is None:
-            print(f"[ERROR] Pipeline answer() returned None - this should not happen!")
+            logger.error("Pipeline answer() returned None - this should not happen!")
             raise HTTPException(
                 status_code=500,
                 detail="Pipeline returned an empty result. Please try again or check the backend logs."
             )
         
-        print(f"[DEBUG] Pipeline answer completed. Result keys: {list(result.keys())}")
-        print(f"[DEBUG] Answer length: {len(result.get('answer', ''))}, Citations: {len(result.get('cited_sections', []))}")
-        
-        # Persist user message only after successful pipeline answer
-        print(f"[DEBUG] Saving user message to database for session: {request.session_id}")
-        user_saved = await chat_service.add_message(request.session_id, user_message)
-        if user_saved:
-            print(f"[DEBUG] ✅ User message saved. Session now has {len(user_saved.messages)} messages")
-        else:
-            print(f"[ERROR] ❌ Failed to save user message")
-            raise HTTPException(status_code=500, detail="Failed to save user message")
+        logger.debug("Pipeline answer completed. Result keys: %s", list(result.keys()))
+        logger.debug("Answer length: %s, Citations: %s", len(result.get('answer', '')), len(result.get('cited_sections', [])))
         
         # Calculate confidence from retriever scores if not provided by generator
         confidence = result.get("confidence")
@@ -743,9 +800,9 @@ async def ask_question(request: ChatAskRequest):
                 seen.add(citation_num)
                 used_citation_numbers.append(citation_num)
         
-        print(f"[DEBUG] Citations used in answer (total markers: {len(all_citation_markers)}, unique: {len(used_citation_numbers)}): {used_citation_numbers}")
-        print(f"[DEBUG] Total citations from pipeline: {len(result.get('cited_sections', []))}")
-        print(f"[DEBUG] Pipeline citations (hit indices): {result.get('citations', [])}")
+        logger.debug("Citations used in answer (total markers: %s, unique: %s): %s", len(all_citation_markers), len(used_citation_numbers), used_citation_numbers)
+        logger.debug("Total citations from pipeline: %s", len(result.get('cited_sections', [])))
+        logger.debug("Pipeline citations (hit indices): %s", result.get('citations', []))
         
         # Get data from pipeline
         pipeline_citations = result.get("citations", [])  # Hit indices (0-indexed) in order of appearance (only valid ones)
@@ -771,12 +828,12 @@ async def ask_question(request: ChatAskRequest):
         ])
         
         if is_about_previous_questions:
-            print(f"[DEBUG] ⚠️ Answer appears to be about previous questions - checking previous messages for citations")
+            logger.debug("⚠️ Answer appears to be about previous questions - checking previous messages for citations")
             # Get previous assistant messages that have citations
             for msg in chat_history:
                 if msg.role == "assistant" and msg.metadata and msg.metadata.get("cited_sections"):
                     prev_cited = msg.metadata.get("cited_sections", [])
-                    print(f"[DEBUG] Found previous message with {len(prev_cited)} citations")
+                    logger.debug("Found previous message with %s citations", len(prev_cited))
                     # Map previous citations by their citation_number
                     for prev_cit in prev_cited:
                         cit_num = prev_cit.get("citation_number") or prev_cit.get("citation_label", "").replace("c", "")
@@ -784,7 +841,7 @@ async def ask_question(request: ChatAskRequest):
                             try:
                                 cit_num_int = int(cit_num) if isinstance(cit_num, str) and cit_num.isdigit() else cit_num
                                 previous_citations_map[cit_num_int] = prev_cit
-                                print(f"[DEBUG] Mapped previous citation c{cit_num_int}")
+                                logger.debug("Mapped previous citation c%s", cit_num_int)
                             except:
                                 pass
         
@@ -798,7 +855,7 @@ async def ask_question(request: ChatAskRequest):
                 # This hit_index was already mapped - reuse the same citation number
                 new_num = hit_index_to_new_num[hit_index]
                 old_to_new_map[original_citation_num] = new_num
-                print(f"[DEBUG] Citation c{original_citation_num} (hit index {hit_index}) already mapped to c{new_num}, reusing")
+                logger.debug("Citation c%s (hit index %s) already mapped to c%s, reusing", original_citation_num, hit_index, new_num)
                 continue
             
             # Find citation by hit_index in our mapping (from current retrieval)
@@ -815,13 +872,13 @@ async def ask_question(request: ChatAskRequest):
             if not cit and is_about_previous_questions and original_citation_num in previous_citations_map:
                 cit = previous_citations_map[original_citation_num]
                 is_from_previous = True
-                print(f"[DEBUG] ✅ Found citation c{original_citation_num} from previous message (answer about previous questions)")
+                logger.debug("✅ Found citation c%s from previous message (answer about previous questions)", original_citation_num)
                 # When using citation from previous message, preserve original citation number if possible
                 # or assign new sequential number
                 new_num = len(used_citations) + 1
                 old_to_new_map[original_citation_num] = new_num
                 # Don't map hit_index for previous citations since they don't have hit_index
-                print(f"[DEBUG] Mapping previous citation c{original_citation_num} -> c{new_num}")
+                logger.debug("Mapping previous citation c%s -> c%s", original_citation_num, new_num)
             elif cit:
                 # Citation found in current retrieval - normal flow
                 # Assign new sequential number
@@ -838,9 +895,9 @@ async def ask_question(request: ChatAskRequest):
                     if not excerpt or len(excerpt.strip()) == 0:
                         # Fallback to summary from previous message
                         excerpt = cit.get("summary", "") or cit.get("text", "") or cit.get("content", "") or ""
-                        print(f"[DEBUG] Citation from previous message - using summary (excerpt was empty)")
+                        logger.debug("Citation from previous message - using summary (excerpt was empty)")
                     else:
-                        print(f"[DEBUG] Citation from previous message - using full excerpt")
+                        logger.debug("Citation from previous message - using full excerpt")
                 else:
                     # Citation from current retrieval - normal flow
                     excerpt = cit.get("excerpt", "")
@@ -851,17 +908,17 @@ async def ask_question(request: ChatAskRequest):
                 
                 # CRITICAL: Log excerpt to debug missing characters
                 if excerpt:
-                    print(f"[DEBUG] Citation c{new_num} excerpt preview: '{excerpt[:100]}...'")
-                    print(f"[DEBUG] Citation c{new_num} excerpt length: {len(excerpt)}")
+                    logger.debug("Citation c%s excerpt preview: '%s...'", new_num, excerpt[:100])
+                    logger.debug("Citation c%s excerpt length: %s", new_num, len(excerpt))
                     if len(excerpt) > 0:
-                        print(f"[DEBUG] Citation c{new_num} excerpt first 50 chars: '{excerpt[:50]}'")
+                        logger.debug("Citation c%s excerpt first 50 chars: '%s'", new_num, excerpt[:50])
                 
                 # For summary: if citation is from previous message and already has a summary, use it
                 # Otherwise, create summary from excerpt
                 if is_from_previous and cit.get("summary"):
                     # Use existing summary from previous message (already formatted)
                     summary_text = cit.get("summary")
-                    print(f"[DEBUG] Citation c{new_num} from previous - using existing summary")
+                    logger.debug("Citation c%s from previous - using existing summary", new_num)
                 elif len(excerpt) > 950:  # 800 + 150 + space for "..."
                     # Preserve more at the beginning to avoid losing important context
                     # Try to start from a word boundary (space or punctuation)
@@ -882,7 +939,7 @@ async def ask_question(request: ChatAskRequest):
                             last_part = excerpt[-(150 + first_space):]
                     
                     summary_text = first_part + "..." + last_part
-                    print(f"[DEBUG] Citation c{new_num} summary first 50 chars: '{summary_text[:50]}'")
+                    logger.debug("Citation c%s summary first 50 chars: '%s'", new_num, summary_text[:50])
                 elif len(excerpt) > 500:
                     # For medium excerpts, preserve more at start
                     first_part = excerpt[:400]
@@ -899,7 +956,7 @@ async def ask_question(request: ChatAskRequest):
                             last_part = excerpt[-(100 + first_space):]
                     
                     summary_text = first_part + "..." + last_part
-                    print(f"[DEBUG] Citation c{new_num} summary first 50 chars: '{summary_text[:50]}'")
+                    logger.debug("Citation c%s summary first 50 chars: '%s'", new_num, summary_text[:50])
                 else:
                     # If excerpt is short enough, use the full text
                     summary_text = excerpt
@@ -919,7 +976,7 @@ async def ask_question(request: ChatAskRequest):
                 cleaned_citation = _clean_citation_for_ui(citation_data)
                 used_citations.append(cleaned_citation)
             else:
-                print(f"[WARNING] Citation c{original_citation_num} (hit index {hit_index}) not found in valid citations. This citation will be skipped but marker remains in answer.")
+                logger.warning("Citation c%s (hit index %s) not found in valid citations. This citation will be skipped but marker remains in answer.", original_citation_num, hit_index)
         
         # Update answer text to use new sequential citation numbers
         # Replace ALL instances (including duplicates) with the new number
@@ -930,10 +987,10 @@ async def ask_question(request: ChatAskRequest):
             updated_answer = re.sub(rf"\[c{old_num}\]", f"[c{new_num}]", updated_answer)
         
         formatted_citations = used_citations
-        print(f"[DEBUG] Filtered citations: {len(formatted_citations)} (only those actually used in answer)")
+        logger.debug("Filtered citations: %s (only those actually used in answer)", len(formatted_citations))
         if len(formatted_citations) < len(used_citation_numbers):
             missing = set(used_citation_numbers) - set(old_to_new_map.keys())
-            print(f"[WARNING] {len(missing)} citation(s) missing references: {missing}")
+            logger.warning("%s citation(s) missing references: %s", len(missing), missing)
         
         # Extract document IDs used from result
         document_ids_used = result.get("document_ids_used", [])
@@ -945,8 +1002,8 @@ async def ask_question(request: ChatAskRequest):
         retriever_scores_clean = _convert_objectids_to_strings(result.get("retriever_scores", []))
         
         # Add assistant response to chat history with citations, confidence, and document info
-        print(f"[DEBUG] Preparing assistant message with {len(formatted_citations)} citations, confidence: {confidence}")
-        print(f"[DEBUG] Documents used: {document_ids_used_clean}, Used chat history: {used_chat_history}")
+        logger.debug("Preparing assistant message with %s citations, confidence: %s", len(formatted_citations), confidence)
+        logger.debug("Documents used: %s, Used chat history: %s", document_ids_used_clean, used_chat_history)
         assistant_message = ChatMessageCreate(
             role="assistant",
             content=updated_answer,
@@ -959,12 +1016,16 @@ async def ask_question(request: ChatAskRequest):
                 "session_id": request.session_id,  # Session ID for reference
             }
         )
-        print(f"[DEBUG] Calling chat_service.add_message() for session: {request.session_id}")
-        saved_session = await chat_service.add_message(request.session_id, assistant_message)
+        # Persist the question and its answer together, only after a
+        # successful pipeline answer: one insert and one session touch
+        logger.debug("Saving user and assistant messages for session: %s", request.session_id)
+        saved_session = await chat_service.add_messages(
+            request.session_id, [user_message, assistant_message], session=session
+        )
         
         if saved_session:
             msg_count = len(saved_session.messages) if saved_session.messages else 0
-            print(f"[DEBUG] ✅ Message saved successfully! Session now has {msg_count} messages")
+            logger.debug("✅ Message saved successfully! Session now has %s messages", msg_count)
             
             # Send WebSocket notification for chat status
             try:
@@ -984,7 +1045,8 @@ async def ask_question(request: ChatAskRequest):
                 )
                 # Don't fail the request if WebSocket notification fails
         else:
-            print(f"[ERROR] ❌ Failed to save assistant message - saved_session is None")
+            logger.error("❌ Failed to save chat messages - saved_session is None")
+            raise HTTPException(status_code=500, detail="Failed to save chat messages")
         
         # No more embedding - just save to chat history
         
@@ -998,7 +1060,7 @@ async def ask_question(request: ChatAskRequest):
             cited_sections=formatted_citations,  # Formatted citations
             retriever_scores=result.get("retriever_scores", []),
             message_id=message_id,
-            timestamp=datetime.utcnow(),
+            timestamp=datetime.now(timezone.utc),
             confidence=confidence
         )
         
@@ -1023,8 +1085,8 @@ async def ask_with_upload(
         import base64
         from pathlib import Path
         
-        # Get or create session
-        session = await chat_service.get_session(session_id)
+        # Get the session header plus the recent history used as context
+        session = await chat_service.get_session_tail(session_id, CHAT_HISTORY_LIMIT)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
@@ -1061,22 +1123,21 @@ async def ask_with_upload(
                         
                         # Store relative path for database
                         user_images_paths.append(f"./{temp_path}")
-                        print(f"[DEBUG] Uploaded image saved to: {temp_path}")
+                        logger.debug("Uploaded image saved to: %s", temp_path)
                         
                     except Exception as e:
-                        print(f"[WARNING] Failed to process uploaded image: {e}")
+                        logger.warning("Failed to process uploaded image: %s", e)
                         continue
         
         # Get recent chat history for context (last 10 messages for better context)
-        chat_history = await chat_service.get_recent_messages(session_id, limit=10)
+        chat_history = session.messages
         
-        # Debug: Print chat history retrieved
-        print(f"[DEBUG] ===== CHAT HISTORY RETRIEVED (ask-with-upload) =====")
-        print(f"[DEBUG] Retrieved {len(chat_history)} messages from database")
-        for i, msg in enumerate(chat_history):
-            content_preview = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
-            print(f"[DEBUG] Message {i+1}: {msg.role} - {content_preview}")
-        print(f"[DEBUG] ================================")
+        # Debug: Print chat history retrieved (previews are only built when DEBUG is on)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Retrieved %s messages from database", len(chat_history))
+            for i, msg in enumerate(chat_history):
+                content_preview = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
+                logger.debug("Message %s: %s - %s", i+1, msg.role, content_preview)
         
         # No more embedding search - just use recent chat history
         
@@ -1085,35 +1146,7 @@ async def ask_with_upload(
         
         # Add system prompt (not saved in DB, added dynamically here)
         # STRONGER PROMPT for chat history usage (same as /ask endpoint)
-        system_prompt = (
-            "You are a helpful assistant that answers questions using chat history, images, and document context."
-            + document_metadata_info +  # Add document metadata here
-            "\n\nCRITICAL: You MUST use the chat history provided below to answer questions about previous conversations."
-            "\nWhen the user asks 'What did I ask before?', 'What were my previous questions?', 'What did we discuss?', "
-            "or similar questions, you MUST review the chat history and provide a clear summary of ALL previous questions and answers."
-            "\n\nPRIORITY ORDER:"
-            "\n1. CHAT HISTORY FIRST: For ANY question about previous messages, you MUST check and summarize the chat history provided below. "
-            "List all previous user questions and your corresponding answers clearly."
-            "\n2. Analyze user-uploaded images directly for image questions."
-            "\n3. Use provided document context only to support explanations."
-            "\n\nRULES:"
-            "\n- For simple greetings or casual conversation (e.g., 'hi', 'hello', 'thanks'), respond briefly and naturally WITHOUT using document context. Keep it short and friendly."
-            "\n- For questions that don't require document knowledge (greetings, casual chat, general questions), answer directly without referencing document contexts."
-            "\n- ONLY use document contexts when the question is about the document content, research topics, or requires specific information from the document."
-            "\n- NEVER ignore chat history when asked about previous questions. The chat history below contains ALL previous messages."
-            "\n- When summarizing previous questions, be specific: mention what was asked and what was answered."
-            "\n- Never quote raw document text when answering."
-            "\n- Focus on what is visible in images for image-related queries."
-            "\n- Be concise and factual. Add [cN] markers ONLY when referencing document context."
-            "\n\nFORMATTING (IMPORTANT):"
-            "\n- Format your response using Markdown for better readability:"
-            "\n  * Use **bold** for important terms, author names, and key concepts"
-            "\n  * Use *italic* or `backticks` for document titles, paper names, and technical terms"
-            "\n  * Use proper markdown lists (bullets or numbered) when listing multiple items"
-            "\n  * Keep citations [cN] clearly visible and properly formatted"
-            "\n- Example format: The authors of the document *\"CiteRead: Integrating Localized Citation Contexts into Scientific Paper Reading\"* are **Napol Rachatasumrit**, **Jonathan Bragg**, **Amy X. Zhang**, and **Daniel S. Weld** [c1]."
-            "\n- At the end of your answer, provide a confidence score (0.0-1.0) based on how well the provided document context supports your answer. Format: [CONFIDENCE:0.85]"
-        )
+        system_prompt = _SYSTEM_PROMPT_INTRO + document_metadata_info + _UPLOAD_SYSTEM_PROMPT_RULES
         history_for_generator.append({
             "role": "system",
             "content": system_prompt,
@@ -1129,24 +1162,23 @@ async def ask_with_upload(
             })
         
         # Debug: Count messages by role to confirm assistant messages are included
-        user_count = sum(1 for msg in history_for_generator if msg.get("role") == "user")
-        assistant_count = sum(1 for msg in history_for_generator if msg.get("role") == "assistant")
-        system_count = sum(1 for msg in history_for_generator if msg.get("role") == "system")
-        print(f"[DEBUG] ===== CHAT HISTORY PREPARED FOR GENERATOR (ask-with-upload) =====")
-        print(f"[DEBUG] Total messages: {len(history_for_generator)}")
-        print(f"[DEBUG]   - System messages: {system_count}")
-        print(f"[DEBUG]   - User messages: {user_count}")
-        print(f"[DEBUG]   - Assistant messages (OpenAI responses): {assistant_count}")
-        if user_count > 0 or assistant_count > 0:
-            print(f"[DEBUG] ✅ Chat history will be passed to OpenAI")
-            # Show preview of first few messages
-            for i, msg in enumerate(history_for_generator[:5]):
-                role = msg.get("role")
-                content_preview = msg.get("content", "")[:80] + "..." if len(msg.get("content", "")) > 80 else msg.get("content", "")
-                print(f"[DEBUG]   [{i+1}] {role}: {content_preview}")
-        else:
-            print(f"[DEBUG] ⚠️ WARNING: No user/assistant messages in history - this is a new conversation")
-        print(f"[DEBUG] ===============================================")
+        if logger.isEnabledFor(logging.DEBUG):
+            user_count = sum(1 for msg in history_for_generator if msg.get("role") == "user")
+            assistant_count = sum(1 for msg in history_for_generator if msg.get("role") == "assistant")
+            system_count = sum(1 for msg in history_for_generator if msg.get("role") == "system")
+            logger.debug("Total messages: %s", len(history_for_generator))
+            logger.debug("- System messages: %s", system_count)
+            logger.debug("- User messages: %s", user_count)
+            logger.debug("- Assistant messages (OpenAI responses): %s", assistant_count)
+            if user_count > 0 or assistant_count > 0:
+                logger.debug("✅ Chat history will be passed to OpenAI")
+                # Show preview of first few messages
+                for i, msg in enumerate(history_for_generator[:5]):
+                    role = msg.get("role")
+                    content_preview = msg.get("content", "")[:80] + "..." if len(msg.get("content", "")) > 80 else msg.get("content", "")
+                    logger.debug("[%s] %s: %s", i+1, role, content_preview)
+            else:
+                logger.debug("⚠️ WARNING: No user/assistant messages in history - this is a new conversation")
         
         # Extract images from chat history for comparison
         history_base64_images = []
@@ -1181,14 +1213,14 @@ async def ask_with_upload(
                                 b64 = base64.b64encode(img_bytes).decode("ascii")
                                 data_url = f"data:{mime};base64,{b64}"
                                 history_base64_images.append(data_url)
-                                print(f"[DEBUG] History image {img} -> base64")
+                                logger.debug("History image %s -> base64", img)
                             else:
-                                print(f"[WARNING] History image file not found: {img}")
+                                logger.warning("History image file not found: %s", img)
                         except Exception as e:
-                            print(f"[WARNING] Failed to process history image {img}: {e}")
+                            logger.warning("Failed to process history image %s: %s", img, e)
         
-        print(f"[DEBUG] Chat history for generator: {len(history_for_generator)} messages")
-        print(f"[DEBUG] Found {len(history_base64_images)} images from chat history")
+        logger.debug("Chat history for generator: %s messages", len(history_for_generator))
+        logger.debug("Found %s images from chat history", len(history_base64_images))
         
         # Add user question to chat history with file paths in metadata
         user_message = ChatMessageCreate(
@@ -1198,12 +1230,11 @@ async def ask_with_upload(
                 "user_images": user_images_paths if user_images_paths else []
             }
         )
-        await chat_service.add_message(session_id, user_message)
+        # add_message appends to the session already loaded, so no re-read is needed
+        session = await chat_service.add_message(session_id, user_message, session=session)
         
         # No more embedding - just save to chat history
         
-        # Get session to extract identifiers
-        session = await chat_service.get_session(session_id)
         document_id = None
         session_metadata: Dict[str, Any] = {}
 
@@ -1228,7 +1259,7 @@ async def ask_with_upload(
         if metadata_changed:
             await chat_repository.update_session_metadata(session_id, updated_metadata)
             session_metadata = updated_metadata
-            print(f"[DEBUG] Updated session metadata with canonical document info: {updated_metadata}")
+            logger.debug("Updated session metadata with canonical document info: %s", updated_metadata)
 
         # Configure and get cached QA pipeline (reuses chunks and embeddings)
         config = PipelineConfig(
@@ -1243,10 +1274,10 @@ async def ask_with_upload(
         all_base64_images = user_images_base64 + history_base64_images
         
         # Use cached pipeline - only rebuilds when PDFs change
-        print(f"[DEBUG] Getting pipeline for question: {question[:50]}... (document_id: {document_id})")
+        logger.debug("Getting pipeline for question: %s... (document_id: %s)", question[:50], document_id)
         pipeline = await get_pipeline(config, pdf_name=None, document_id=document_id)
         if pipeline is None:
-            print(f"[ERROR] get_pipeline() returned None - this should not happen!")
+            logger.error("get_pipeline() returned None - this should not happen!")
             raise HTTPException(
                 status_code=500,
                 detail="Failed to initialize pipeline. Please check the backend logs and ensure the document is properly processed."
@@ -1259,7 +1290,7 @@ async def ask_with_upload(
         
         # Validate result is not None
         if result is None:
-            print(f"[ERROR] Pipeline answer() returned None - this should not happen!")
+            logger.error("Pipeline answer() returned None - this should not happen!")
             raise HTTPException(
                 status_code=500,
                 detail="Pipeline returned an empty result. Please try again or check the backend logs."
@@ -1289,9 +1320,9 @@ async def ask_with_upload(
             if citation_num not in used_citation_numbers:
                 used_citation_numbers.append(citation_num)
         
-        print(f"[DEBUG] Citations used in answer: {used_citation_numbers}")
-        print(f"[DEBUG] Total citations from pipeline: {len(result.get('cited_sections', []))}")
-        print(f"[DEBUG] Pipeline citations (hit indices): {result.get('citations', [])}")
+        logger.debug("Citations used in answer: %s", used_citation_numbers)
+        logger.debug("Total citations from pipeline: %s", len(result.get('cited_sections', [])))
+        logger.debug("Pipeline citations (hit indices): %s", result.get('citations', []))
         
         # Get data from pipeline
         pipeline_citations = result.get("citations", [])  # Hit indices (0-indexed) in order of appearance (only valid ones)
@@ -1356,7 +1387,7 @@ async def ask_with_upload(
                 used_citations.append(cleaned_citation)
                 old_to_new_map[original_citation_num] = new_num
             else:
-                print(f"[WARNING] Citation c{original_citation_num} (hit index {hit_index}) not found in valid citations. This citation will be skipped but marker remains in answer.")
+                logger.warning("Citation c%s (hit index %s) not found in valid citations. This citation will be skipped but marker remains in answer.", original_citation_num, hit_index)
         
         # Update answer text to use new sequential citation numbers
         updated_answer = answer_text
@@ -1365,10 +1396,10 @@ async def ask_with_upload(
             updated_answer = updated_answer.replace(f"[c{old_num}]", f"[c{new_num}]")
         
         formatted_citations = used_citations
-        print(f"[DEBUG] Filtered citations: {len(formatted_citations)} (only those actually used in answer)")
+        logger.debug("Filtered citations: %s (only those actually used in answer)", len(formatted_citations))
         if len(formatted_citations) < len(used_citation_numbers):
             missing = set(used_citation_numbers) - set(old_to_new_map.keys())
-            print(f"[WARNING] {len(missing)} citation(s) missing references: {missing}")
+            logger.warning("%s citation(s) missing references: %s", len(missing), missing)
         
         # Extract document IDs used from result
         document_ids_used = result.get("document_ids_used", [])
@@ -1380,8 +1411,8 @@ async def ask_with_upload(
         retriever_scores_clean = _convert_objectids_to_strings(result.get("retriever_scores", []))
         
         # Add assistant response to chat history with citations, confidence, and document info
-        print(f"[DEBUG] Preparing assistant message with {len(formatted_citations)} citations, confidence: {confidence}")
-        print(f"[DEBUG] Documents used: {document_ids_used_clean}, Used chat history: {used_chat_history}")
+        logger.debug("Preparing assistant message with %s citations, confidence: %s", len(formatted_citations), confidence)
+        logger.debug("Documents used: %s, Used chat history: %s", document_ids_used_clean, used_chat_history)
         assistant_message = ChatMessageCreate(
             role="assistant",
             content=updated_answer,
@@ -1394,7 +1425,7 @@ async def ask_with_upload(
                 "session_id": session_id,  # Session ID for reference
             }
         )
-        await chat_service.add_message(session_id, assistant_message)
+        await chat_service.add_message(session_id, assistant_message, session=session)
         
         # Send WebSocket notification for chat status
         try:
@@ -1426,7 +1457,7 @@ async def ask_with_upload(
             cited_sections=formatted_citations,  # Formatted citations
             retriever_scores=result.get("retriever_scores", []),
             message_id=message_id,
-            timestamp=datetime.utcnow(),
+            timestamp=datetime.now(timezone.utc),
             confidence=confidence
         )
         
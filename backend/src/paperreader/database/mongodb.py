@@ -1,7 +1,9 @@
 import os
-from typing import Optional
+from datetime import timezone
+from typing import Dict, Hashable, Optional
 
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo.write_concern import WriteConcern
 
 
 class MongoDBConnection:
@@ -10,8 +12,17 @@ class MongoDBConnection:
     def __init__(self) -> None:
         self._uri = os.getenv("MONGODB_URI")
         self._db_name = os.getenv("MONGODB_DATABASE", "paperreader")
+        # Shared connection pool settings; every repository reuses this client's sockets
+        self._pool_options = {
+            "maxPoolSize": int(os.getenv("MONGODB_MAX_POOL_SIZE", "100")),
+            "minPoolSize": int(os.getenv("MONGODB_MIN_POOL_SIZE", "10")),
+            "maxIdleTimeMS": int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", "60000")),
+            "waitQueueTimeoutMS": int(os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+        }
         self._client: Optional[AsyncIOMotorClient] = None
         self._database: Optional[AsyncIOMotorDatabase] = None
+        # Collection wrappers are built once per connection and reused per call
+        self._collections: Dict[Hashable, AsyncIOMotorCollection] = {}
 
     async def connect(self) -> None:
         """Establish a singleton connection if needed."""
@@ -21,7 +32,15 @@ class MongoDBConnection:
         if not self._uri:
             raise ValueError("Missing MONGODB_URI environment variable for backend MongoDB connection")
 
-        self._client = AsyncIOMotorClient(self._uri, uuidRepresentation="standard")
+        # Decode BSON dates as aware UTC datetimes so values read back carry
+        # the same offset as the aware timestamps the repositories write
+        self._client = AsyncIOMotorClient(
+            self._uri,
+            uuidRepresentation="standard",
+            tz_aware=True,
+            tzinfo=timezone.utc,
+            **self._pool_options,
+        )
         self._database = self._client[self._db_name]
         print(f"[MongoDB] Connected to database '{self._db_name}'")
 
@@ -33,6 +52,7 @@ class MongoDBConnection:
         self._client.close()
         self._client = None
         self._database = None
+        self._collections.clear()
         print("[MongoDB] Connection closed")
 
     @property
@@ -41,8 +61,20 @@ class MongoDBConnection:
             raise RuntimeError("MongoDB is not connected. Call connect() during startup.")
         return self._database
 
-    def get_collection(self, name: str):
-        return self.database[name]
+    def get_collection(
+        self,
+        name: str,
+        write_concern: Optional[WriteConcern] = None,
+    ) -> AsyncIOMotorCollection:
+        """Return a cached collection handle, optionally bound to a non-default write concern."""
+        key: Hashable = name
+        if write_concern is not None:
+            key = (name, tuple(sorted(write_concern.document.items())))
+        collection = self._collections.get(key)
+        if collection is None:
+            collection = self.database.get_collection(name, write_concern=write_concern)
+            self._collections[key] = collection
+        return collection
 
 
 # Global MongoDB connection instance
@@ -1,8 +1,11 @@
+import logging
+import logging.handlers
 import os
+import queue
 from pathlib import Path
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from paperreader.api import pdf_routes  # main backend routes
@@ -42,17 +45,68 @@ from paperreader.database.postgres import close_postgres_pool, init_postgres_poo
 from paperreader.services.qa.embeddings import get_embedder
 from paperreader.services.skimming.repository import create_skimming_indexes
 from paperreader.services.annotations.repository import create_annotation_indexes
+from paperreader.services.chat.repository import create_chat_indexes
 from starlette.middleware.sessions import SessionMiddleware
 
 # from paperreader.api.chat_embedding_routes import router as chat_embedding_router  # Chat embedding routes (removed as unused)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 if "OPENAI_API_KEY" not in os.environ:
     raise ValueError("Missing OPENAI_API_KEY in environment!")
 
 
+def _configure_logging() -> logging.handlers.QueueListener:
+    """
+    Configure root logging so request handlers only enqueue records.
+
+    The stream handler installed by basicConfig is moved behind a
+    QueueListener thread, keeping formatting and stdout writes off the
+    event loop.
+    """
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(name)s %(levelname)s %(message)s",
+    )
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+# Probe endpoints return constant payloads; serialize them once at import
+_HEALTH_BODY = b'{"status":"ok"}'
+_ROOT_BODY = '{"message":"Welcome to LOL PaperReader Backend 🚀"}'.encode("utf-8")
+
+# (router, include_router kwargs) in mount order
+_ROUTER_SPECS = [
+    (auth_router, {}),
+    (websocket_routes.router, {"tags": ["WebSocket"]}),  # WebSocket at root level
+    (pdf_routes.router, {"prefix": "/api/pdf", "tags": ["PDF"]}),
+    # No prefix - router already has /api/pdf prefix
+    (pdf_proxy_router, {"tags": ["PDF Proxy"]}),
+    (qa_router, {"prefix": "/api/qa", "tags": ["QA"]}),
+    (chat_router, {"prefix": "/api/chat", "tags": ["Chat"]}),
+    (skimming_router, {"prefix": "/api/skimming", "tags": ["Skimming"]}),
+    (summary_router, {"prefix": "/api/summary", "tags": ["Summary"]}),
+    # Taxonomy routes (already has /api/taxonomy prefix)
+    (taxonomy_router, {}),
+    (annotation_router, {"prefix": "/api/annotations", "tags": ["Annotations"]}),
+    (keyword_router, {"prefix": "/api/keywords", "tags": ["Keywords"]}),
+    (reference_routes.router, {"prefix": "/api"}),
+    (documents_router, {}),
+    (collections_router, {}),
+]
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="LOL PaperReader API",
@@ -97,28 +151,13 @@ def create_app() -> FastAPI:
     # ------------------------
     # Routers
     # ------------------------
-    app.include_router(auth_router)
-    app.include_router(
-        websocket_routes.router, tags=["WebSocket"]
-    )  # WebSocket at root level
-    app.include_router(pdf_routes.router, prefix="/api/pdf", tags=["PDF"])
-    app.include_router(
-        pdf_proxy_router, tags=["PDF Proxy"]
-    )  # No prefix - router already has /api/pdf prefix
-    app.include_router(qa_router, prefix="/api/qa", tags=["QA"])
-    app.include_router(chat_router, prefix="/api/chat", tags=["Chat"])
-    app.include_router(skimming_router, prefix="/api/skimming", tags=["Skimming"])
-    app.include_router(summary_router, prefix="/api/summary", tags=["Summary"])
-    app.include_router(
-        taxonomy_router
-    )  # Taxonomy routes (already has /api/taxonomy prefix)
-    app.include_router(annotation_router, prefix="/api/annotations", tags=["Annotations"])
-    app.include_router(keyword_router, prefix="/api/keywords", tags=["Keywords"])
-    app.include_router(reference_routes.router, prefix="/api")
-    app.include_router(documents_router)
-    app.include_router(collections_router)
+    # Mount every router on one parent, then attach it to the app in a single call
+    api = APIRouter()
+    for router, options in _ROUTER_SPECS:
+        api.include_router(router, **options)
     # Chat Embedding API disabled as unused
     # app.include_router(chat_embedding_router, prefix="/api/chat-embedding", tags=["Chat Embedding"])
+    app.include_router(api)
 
     # ------------------------
     # Static files (for parsed figures)
@@ -133,6 +172,7 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def startup_event():
         """Initialize database connections and preload embedder model."""
+        app.state.log_listener = _configure_logging()
         await mongodb.connect()
         await init_postgres_pool()
 
@@ -140,19 +180,19 @@ def create_app() -> FastAPI:
         try:
             await create_skimming_indexes()
         except Exception as e:
-            print(f"[STARTUP] Warning: Failed to create skimming indexes: {e}")
-            import traceback
+            logger.warning("Failed to create skimming indexes: %s", e, exc_info=True)
 
-            print(f"[STARTUP] Traceback: {traceback.format_exc()}")
-        
         # Create indexes for user annotations collection
         try:
             await create_annotation_indexes()
         except Exception as e:
-            print(f"[STARTUP] Warning: Failed to create annotation indexes: {e}")
-            import traceback
+            logger.warning("Failed to create annotation indexes: %s", e, exc_info=True)
 
-            print(f"[STARTUP] Traceback: {traceback.format_exc()}")
+        # Create indexes for chat sessions
+        try:
+            await create_chat_indexes()
+        except Exception as e:
+            logger.warning("Failed to create chat indexes: %s", e, exc_info=True)
 
         # Preload Visualized_BGE embedder model in background (non-blocking)
         # NOTE: Warmup disabled because it blocks the event loop during model loading
@@ -161,49 +201,61 @@ def create_app() -> FastAPI:
 
         async def do_warmup():
             try:
-                print("[STARTUP] (bg) Preloading Visualized_BGE embedder...")
+                logger.info("(bg) Preloading Visualized_BGE embedder...")
                 embedder = get_embedder(None)
                 # CRITICAL: Preload model AND tokenizer to avoid download delay during first chunking
-                print(
-                    "[STARTUP] (bg) Triggering model load (this will download tokenizer files if needed)..."
+                logger.info(
+                    "(bg) Triggering model load (this will download tokenizer files if needed)..."
                 )
                 await asyncio.to_thread(
                     embedder._ensure_model
                 )  # Load model which loads tokenizer
-                print("[STARTUP] (bg) Model loaded, now testing embedding...")
+                logger.info("(bg) Model loaded, now testing embedding...")
                 await asyncio.to_thread(
                     embedder.embed, ["warmup"]
                 )  # Test embedding works
-                print("[STARTUP] (bg) ✅ Embedder fully ready (model + tokenizer)")
+                logger.info("(bg) Embedder fully ready (model + tokenizer)")
             except Exception as e:
-                print(
-                    f"[STARTUP] (bg) Embedder preload failed (will retry on first use): {e}"
+                logger.warning(
+                    "(bg) Embedder preload failed (will retry on first use): %s",
+                    e,
+                    exc_info=True,
                 )
-                import traceback
 
-                print(f"[STARTUP] (bg) Traceback: {traceback.format_exc()}")
+        def _log_warmup_result(task: "asyncio.Task") -> None:
+            if task.cancelled():
+                return
+            exc = task.exception()
+            if exc is not None:
+                logger.error("(bg) Embedder warmup task failed: %s", exc)
 
-        # DISABLED: Warmup blocks the event loop and prevents server from responding
-        asyncio.create_task(do_warmup())
-        #print("[STARTUP] Embedder warmup disabled - models will load on first use")
+        # Keep a strong reference so the task is not garbage-collected mid-flight
+        app.state.warmup_task = asyncio.create_task(do_warmup(), name="embedder-warmup")
+        app.state.warmup_task.add_done_callback(_log_warmup_result)
 
     @app.on_event("shutdown")
     async def shutdown_event():
         """Cleanup on shutdown"""
-        print("✅ Shutting down application")
+        logger.info("Shutting down application")
+        warmup_task = getattr(app.state, "warmup_task", None)
+        if warmup_task is not None and not warmup_task.done():
+            warmup_task.cancel()
         await mongodb.disconnect()
         await close_postgres_pool()
+        log_listener = getattr(app.state, "log_listener", None)
+        if log_listener is not None:
+            log_listener.stop()
 
     # ------------------------
     # Health and Root routes
     # ------------------------
-    @app.get("/health", tags=["System"])
+    @app.get("/health", tags=["System"], include_in_schema=False)
     def health():
-        return {"status": "ok"}
+        return Response(content=_HEALTH_BODY, media_type="application/json")
 
-    @app.get("/", tags=["System"])
+    @app.get("/", tags=["System"], include_in_schema=False)
     def read_root():
-        return {"message": "Welcome to LOL PaperReader Backend 🚀"}
+        return Response(content=_ROOT_BODY, media_type="application/json")
 
     return app
 
@@ -1,16 +1,24 @@
 # chat.py
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 import uuid
 
+_UTC = timezone.utc
+
+
+def _utcnow() -> datetime:
+    """Timezone-aware UTC timestamp used as the default for model timestamps."""
+    return datetime.now(_UTC)
+
+
 # -----------------------------
 # Chat message model
 # -----------------------------
 class ChatMessage(BaseModel):
     role: str  # "system", "user", or "assistant"
     content: str
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=_utcnow)
     metadata: Optional[Dict[str, Any]] = None  # citations, images, scores, etc.
 
 # -----------------------------
@@ -22,14 +30,23 @@ class ChatSession(BaseModel):
     user_id: Optional[str] = Field(None, description="User identifier if available")
     title: Optional[str] = Field(None, description="Chat session title")
     messages: List[ChatMessage] = Field(default_factory=list)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_utcnow)
+    updated_at: datetime = Field(default_factory=_utcnow)
     metadata: Optional[Dict[str, Any]] = Field(default_factory=dict)
+    message_count: Optional[int] = Field(None, description="Stored message count, when read from the database")
 
-    model_config = {
-        "populate_by_name": True,            # tương đương allow_population_by_field_name
-        "protected_namespaces": ()          # loại bỏ warning "model_" conflict
-    }
+    model_config = ConfigDict(
+        populate_by_name=True,  # tương đương allow_population_by_field_name
+        protected_namespaces=(),  # loại bỏ warning "model_" conflict
+    )
+
+    @classmethod
+    def new(cls, session_id: str, user_id: Optional[str] = None, **fields: Any) -> "ChatSession":
+        """Build a fresh session sharing one timestamp for created_at/updated_at."""
+        now = _utcnow()
+        fields.setdefault("created_at", now)
+        fields.setdefault("updated_at", now)
+        return cls(session_id=session_id, user_id=user_id, **fields)
 
 # -----------------------------
 # Request / Create models
@@ -62,3 +79,9 @@ class ChatMessageResponse(BaseModel):
     content: str
     timestamp: datetime
     metadata: Optional[Dict[str, Any]] = None
+
+# -----------------------------
+# Shared serializers
+# -----------------------------
+# Built once at import so responses reuse the same pydantic-core serializer
+CHAT_SESSION_ADAPTER = TypeAdapter(ChatSessionResponse)
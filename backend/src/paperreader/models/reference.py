@@ -2,7 +2,7 @@ from datetime import datetime
 from typing import Any, List, Optional
 
 from bson import ObjectId
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class BoundingBoxSchema(BaseModel):
@@ -52,18 +52,34 @@ class ReferenceSchema(BaseModel):
 
     @classmethod
     def from_mongo(cls, data: dict) -> "ReferenceSchema":
-        """Convert MongoDB document to Pydantic model."""
+        """Convert MongoDB document to Pydantic model.
+
+        Documents come from our own collection, so validation is skipped.
+        """
         if not data:
             return None
         # Convert ObjectId to string
         if "_id" in data and isinstance(data["_id"], ObjectId):
             data["_id"] = str(data["_id"])
-        return cls(**data)
-
-    class Config:
-        populate_by_name = True
-        json_encoders = {ObjectId: str}
-        json_schema_extra = {
+        data["bib_location"] = [
+            BoundingBoxSchema.model_construct(**box)
+            for box in data.get("bib_location") or []
+        ]
+        data["mentions"] = [
+            CitationMentionSchema.model_construct(
+                text=mention.get("text"),
+                boxes=[
+                    BoundingBoxSchema.model_construct(**box)
+                    for box in mention.get("boxes") or []
+                ],
+            )
+            for mention in data.get("mentions") or []
+        ]
+        return cls.model_construct(**data)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        json_schema_extra={
             "example": {
                 "_id": "507f1f77bcf86cd799439011",
                 "document_id": "doc_123",
@@ -73,7 +89,8 @@ class ReferenceSchema(BaseModel):
                 "year": "2023",
                 "venue": "Conference Name",
             }
-        }
+        },
+    )
 
 
 class ReferenceCreate(BaseModel):
@@ -2,6 +2,7 @@
 
 from paperreader.services.annotations.repository import (
     save_user_annotation,
+    save_user_annotations_bulk,
     get_user_annotations,
     get_user_annotation_by_id,
     update_user_annotation,
@@ -12,6 +13,7 @@ from paperreader.services.annotations.repository import (
 
 __all__ = [
     "save_user_annotation",
+    "save_user_annotations_bulk",
     "get_user_annotations",
     "get_user_annotation_by_id",
     "update_user_annotation",
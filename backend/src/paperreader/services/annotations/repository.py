@@ -6,18 +6,49 @@ Stores user-created highlights and notes for PDF documents in MongoDB.
 
 from __future__ import annotations
 
-from datetime import datetime
+import asyncio
+import logging
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import WriteConcern
 
 from paperreader.database.mongodb import mongodb
 
+logger = logging.getLogger(__name__)
+
+# Fields returned to API callers
+_ANNOTATION_PROJECTION: Dict[str, int] = {
+    "user_id": 1,
+    "document_id": 1,
+    "content": 1,
+    "highlight_areas": 1,
+    "quote": 1,
+    "page_index": 1,
+    "color": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+# Newest annotations first
+_SORT_CREATED_DESC = [("created_at", -1)]
+
+
+# Resolved lazily on first use, once MongoDB is connected
+_collection: Optional[AsyncIOMotorCollection] = None
+
 
 def _user_annotations_collection() -> AsyncIOMotorCollection:
     """Get the user_annotations collection."""
-    return mongodb.get_collection("user_annotations")
+    global _collection
+    if _collection is None:
+        # Acknowledge writes once applied in memory; annotations do not need a journal flush
+        _collection = mongodb.get_collection("user_annotations").with_options(
+            write_concern=WriteConcern(w=1, j=False)
+        )
+    return _collection
 
 
 async def save_user_annotation(
@@ -45,31 +76,74 @@ async def save_user_annotation(
     Returns:
         ID of the saved annotation
     """
-    collection = _user_annotations_collection()
-    
-    # Convert document_id to ObjectId
-    try:
-        doc_object_id = ObjectId(document_id)
-    except Exception:
-        raise ValueError(f"Invalid document_id: {document_id}")
+    annotation_ids = await save_user_annotations_bulk(
+        user_id=user_id,
+        annotations=[
+            {
+                "document_id": document_id,
+                "content": content,
+                "highlight_areas": highlight_areas,
+                "quote": quote,
+                "page_index": page_index,
+                "color": color,
+            }
+        ],
+    )
+    return annotation_ids[0]
+
+
+async def save_user_annotations_bulk(
+    *,
+    user_id: str,
+    annotations: List[Dict[str, Any]],
+) -> List[str]:
+    """
+    Save several user annotations in a single round trip.
     
-    now = datetime.utcnow()
+    Args:
+        user_id: User ID (string)
+        annotations: List of annotation dictionaries with the same keys as
+            the keyword arguments of save_user_annotation (document_id,
+            content, highlight_areas, quote, page_index, optional color)
+        
+    Returns:
+        IDs of the saved annotations, in input order
+    """
+    if not annotations:
+        return []
     
-    payload: Dict[str, Any] = {
-        "user_id": user_id,
-        "document_id": doc_object_id,
-        "content": content,
-        "highlight_areas": highlight_areas,
-        "quote": quote,
-        "page_index": page_index,
-        "color": color or "#ffff00",
-        "created_at": now,
-        "updated_at": now,
-    }
+    collection = _user_annotations_collection()
     
-    result = await collection.insert_one(payload)
-    print(f"[AnnotationRepository] Saved annotation for user_id={user_id}, document_id={document_id}")
-    return str(result.inserted_id)
+    # Validate each distinct document_id once
+    doc_object_ids: Dict[str, ObjectId] = {}
+    for annotation in annotations:
+        document_id = annotation["document_id"]
+        if document_id in doc_object_ids:
+            continue
+        if not ObjectId.is_valid(document_id):
+            raise ValueError(f"Invalid document_id: {document_id}")
+        doc_object_ids[document_id] = ObjectId(document_id)
+    
+    now = datetime.now(timezone.utc)
+    
+    payloads: List[Dict[str, Any]] = [
+        {
+            "user_id": user_id,
+            "document_id": doc_object_ids[annotation["document_id"]],
+            "content": annotation["content"],
+            "highlight_areas": annotation["highlight_areas"],
+            "quote": annotation["quote"],
+            "page_index": annotation["page_index"],
+            "color": annotation.get("color") or "#ffff00",
+            "created_at": now,
+            "updated_at": now,
+        }
+        for annotation in annotations
+    ]
+    
+    result = await collection.insert_many(payloads, ordered=False)
+    logger.debug("Saved %d annotations for user_id=%s", len(result.inserted_ids), user_id)
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
 
 
 async def get_user_annotations(
@@ -91,21 +165,23 @@ async def get_user_annotations(
     query: Dict[str, Any] = {"user_id": user_id}
     
     if document_id:
-        try:
-            doc_object_id = ObjectId(document_id)
-            query["document_id"] = doc_object_id
-        except Exception:
+        if not ObjectId.is_valid(document_id):
             return []
+        query["document_id"] = ObjectId(document_id)
     
-    cursor = collection.find(query).sort("created_at", -1)
-    results = await cursor.to_list(length=None)
+    cursor = (
+        collection.find(query, projection=_ANNOTATION_PROJECTION)
+        .sort(_SORT_CREATED_DESC)
+        .batch_size(500)
+    )
     
-    # Convert ObjectId to string for JSON serialization
-    for result in results:
-        if "_id" in result:
-            result["_id"] = str(result["_id"])
-        if "document_id" in result and isinstance(result["document_id"], ObjectId):
-            result["document_id"] = str(result["document_id"])
+    # Convert ObjectId to string for JSON serialization as documents stream in
+    results: List[Dict[str, Any]] = []
+    # (save_user_annotation always stores document_id as an ObjectId)
+    async for result in cursor:
+        result["_id"] = str(result["_id"])
+        result["document_id"] = str(result["document_id"])
+        results.append(result)
     
     return results
 
@@ -126,23 +202,21 @@ async def get_user_annotation_by_id(
     """
     collection = _user_annotations_collection()
     
-    try:
-        ann_object_id = ObjectId(annotation_id)
-    except Exception:
+    if not ObjectId.is_valid(annotation_id):
         return None
+    ann_object_id = ObjectId(annotation_id)
     
     query = {
         "_id": ann_object_id,
         "user_id": user_id,
     }
     
-    result = await collection.find_one(query)
+    result = await collection.find_one(query, projection=_ANNOTATION_PROJECTION)
     
     if result:
         # Convert ObjectId to string
         result["_id"] = str(result["_id"])
-        if "document_id" in result and isinstance(result["document_id"], ObjectId):
-            result["document_id"] = str(result["document_id"])
+        result["document_id"] = str(result["document_id"])
     
     return result
 
@@ -170,27 +244,18 @@ async def update_user_annotation(
         color: Optional new color
         
     Returns:
-        True if updated, False if not found or not owned by user
+        True if updated (or nothing to update), False if not found or not
+        owned by user
     """
     collection = _user_annotations_collection()
     
-    try:
-        ann_object_id = ObjectId(annotation_id)
-    except Exception:
-        return False
-    
-    # Verify ownership
-    existing = await collection.find_one({
-        "_id": ann_object_id,
-        "user_id": user_id,
-    })
-    
-    if not existing:
+    if not ObjectId.is_valid(annotation_id):
         return False
+    ann_object_id = ObjectId(annotation_id)
     
     # Build update payload
     update_fields: Dict[str, Any] = {
-        "updated_at": datetime.utcnow(),
+        "updated_at": datetime.now(timezone.utc),
     }
     
     if content is not None:
@@ -204,13 +269,18 @@ async def update_user_annotation(
     if color is not None:
         update_fields["color"] = color
     
+    # Only updated_at: nothing to change, skip the write
+    if len(update_fields) == 1:
+        return True
+    
+    # Filtering on user_id doubles as the ownership check
     result = await collection.update_one(
         {"_id": ann_object_id, "user_id": user_id},
         {"$set": update_fields}
     )
     
-    if result.modified_count > 0:
-        print(f"[AnnotationRepository] Updated annotation {annotation_id} for user_id={user_id}")
+    if result.matched_count > 0:
+        logger.debug("Updated annotation %s for user_id=%s", annotation_id, user_id)
         return True
     
     return False
@@ -232,10 +302,9 @@ async def delete_user_annotation(
     """
     collection = _user_annotations_collection()
     
-    try:
-        ann_object_id = ObjectId(annotation_id)
-    except Exception:
+    if not ObjectId.is_valid(annotation_id):
         return False
+    ann_object_id = ObjectId(annotation_id)
     
     result = await collection.delete_one({
         "_id": ann_object_id,
@@ -243,7 +312,7 @@ async def delete_user_annotation(
     })
     
     if result.deleted_count > 0:
-        print(f"[AnnotationRepository] Deleted annotation {annotation_id} for user_id={user_id}")
+        logger.debug("Deleted annotation %s for user_id=%s", annotation_id, user_id)
         return True
     
     return False
@@ -265,10 +334,9 @@ async def delete_user_annotations_by_document(
     """
     collection = _user_annotations_collection()
     
-    try:
-        doc_object_id = ObjectId(document_id)
-    except Exception:
+    if not ObjectId.is_valid(document_id):
         return 0
+    doc_object_id = ObjectId(document_id)
     
     result = await collection.delete_many({
         "user_id": user_id,
@@ -277,7 +345,12 @@ async def delete_user_annotations_by_document(
     
     deleted_count = result.deleted_count or 0
     if deleted_count > 0:
-        print(f"[AnnotationRepository] Deleted {deleted_count} annotations for user_id={user_id}, document_id={document_id}")
+        logger.debug(
+            "Deleted %d annotations for user_id=%s, document_id=%s",
+            deleted_count,
+            user_id,
+            document_id,
+        )
     
     return deleted_count
 
@@ -289,12 +362,20 @@ async def create_annotation_indexes():
     """
     collection = _user_annotations_collection()
     
-    # Index for querying by user and document
-    await collection.create_index([("user_id", 1), ("document_id", 1)])
-    # Index for querying by user only
-    await collection.create_index([("user_id", 1), ("created_at", -1)])
-    # Index for querying by document only
-    await collection.create_index([("document_id", 1), ("created_at", -1)])
+    # Build all indexes concurrently so startup waits for the slowest one only
+    await asyncio.gather(
+        # Index for querying by user and document
+        collection.create_index([("user_id", 1), ("document_id", 1)], background=True),
+        # Index for querying by user only
+        collection.create_index([("user_id", 1), ("created_at", -1)], background=True),
+        # Index for querying by document only
+        collection.create_index([("document_id", 1), ("created_at", -1)], background=True),
+        # Index for per-page lookups, also serving the created_at sort
+        collection.create_index(
+            [("user_id", 1), ("document_id", 1), ("page_index", 1), ("created_at", -1)],
+            background=True,
+        ),
+    )
     
-    print("[AnnotationRepository] ✅ Created indexes for user_annotations")
+    logger.info("Created indexes for user_annotations")
 
@@ -1,6 +1,12 @@
 from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from hashlib import blake2b, sha1
 import base64
+import binascii
+import logging
+import re
 import uuid
 from pathlib import Path
 import os
@@ -14,14 +20,30 @@ from paperreader.services.qa.persistent_vectorstore import PersistentVectorStore
 from paperreader.services.qa.retrievers import build_corpus, build_store
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+
+# Inline base64 data URLs in message content; group 1 is the payload
+_IMG_DATA_URL_RE = re.compile(r'data:image/[^;]+;base64,([A-Za-z0-9+/=]+)')
+
+# Shared pool for decoding/writing message images; both steps release the GIL
+_IMAGE_IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="chat-image-io")
+
+# Base64 characters decoded per write; a multiple of 4 so every slice is whole quads
+_B64_CHUNK_CHARS = 64 * 1024
+
 
 class ChatEmbeddingService:
     """Service to handle embedding of chat messages for retrieval"""
     
+    # Max number of text embeddings kept in the content-hash cache
+    EMBED_CACHE_SIZE = 4096
+    
     def __init__(self):
         self.collection_name = "chat_sessions"
         self.embedding_collection_name = "chat_embeddings"
         self.embedder = None  # Lazy load khi cần
+        self._embed_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
         self.vector_store = None
         self.persistent_store = None
         self._initialize_vector_store()
@@ -39,7 +61,7 @@ class ChatEmbeddingService:
                 tfidf_vectorizer=None
             )
         except Exception as e:
-            print(f"[WARNING] Could not initialize persistent store: {e}")
+            logger.warning("Could not initialize persistent store: %s", e)
             # Initialize empty store
             self.vector_store = InMemoryVectorStore(
                 dense_vectors=np.empty((0, 0)),
@@ -51,17 +73,43 @@ class ChatEmbeddingService:
     def _get_embedder(self):
         """Lazy load embedder when needed"""
         if self.embedder is None:
-            print("[LOG] Loading embedder...")
+            logger.info("Loading embedder...")
             self.embedder = get_embedder()
-            print("[LOG] Embedder loaded successfully")
+            logger.info("Embedder loaded successfully")
         return self.embedder
     
     async def get_unembedded_messages(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get chat messages that haven't been embedded yet"""
         # MongoDB removed - return empty list
-        print("[WARNING] ChatEmbeddingService.get_unembedded_messages() called but MongoDB is disabled")
+        logger.warning("ChatEmbeddingService.get_unembedded_messages() called but MongoDB is disabled")
         return []
     
+    def _embed_texts_cached(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, reusing vectors for content seen before (LRU by content hash)"""
+        keys = [blake2b(text.encode("utf-8"), digest_size=16).digest() for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        misses: Dict[bytes, List[int]] = {}
+        
+        for i, key in enumerate(keys):
+            cached = self._embed_cache.get(key)
+            if cached is not None:
+                self._embed_cache.move_to_end(key)
+                results[i] = cached
+            else:
+                misses.setdefault(key, []).append(i)
+        
+        if misses:
+            miss_keys = list(misses)
+            vectors = self._get_embedder().embed([texts[misses[key][0]] for key in miss_keys])
+            for key, vector in zip(miss_keys, vectors):
+                for i in misses[key]:
+                    results[i] = vector
+                self._embed_cache[key] = vector
+                if len(self._embed_cache) > self.EMBED_CACHE_SIZE:
+                    self._embed_cache.popitem(last=False)
+        
+        return results
+    
     def _has_images_in_message(self, message: ChatMessage) -> bool:
         """Check if a message contains images"""
         if not message.metadata:
@@ -80,81 +128,68 @@ class ChatEmbeddingService:
     
     def _extract_images_from_message(self, message: ChatMessage) -> List[Dict[str, Any]]:
         """Extract images from a chat message"""
-        print(f"[DEBUG] _extract_images_from_message called")
-        print(f"[DEBUG] Message role: {message.role}")
-        print(f"[DEBUG] Message metadata: {message.metadata}")
-        print(f"[DEBUG] Message metadata type: {type(message.metadata)}")
-        
         images = []
+        # (img_data, filename prefix, caption, figure_id), decoded and saved together below
+        pending: List[tuple] = []
+        timestamp = message.timestamp.isoformat()
         
         # Extract from metadata.user_images
         if message.metadata and message.metadata.get("user_images"):
-            print(f"[DEBUG] Found user_images in metadata")
             user_images = message.metadata["user_images"]
-            print(f"[DEBUG] user_images type: {type(user_images)}")
-            print(f"[DEBUG] user_images value: {user_images}")
             
             # Ensure user_images is a list
             if not isinstance(user_images, list):
-                print(f"[WARNING] user_images is not a list, got {type(user_images)}: {user_images}")
+                logger.warning("user_images is not a list, got %s", type(user_images).__name__)
                 return images
             
-            print(f"[DEBUG] Processing {len(user_images)} user_images")
+            logger.debug("Processing %d user_images", len(user_images))
             for i, img_data in enumerate(user_images):
-                print(f"[DEBUG] Processing image {i}: {type(img_data)} - {img_data[:100] if isinstance(img_data, str) else img_data}")
                 # Ensure img_data is a string
                 if not isinstance(img_data, str):
-                    print(f"[WARNING] Image data at index {i} is not a string, got {type(img_data)}: {img_data}")
+                    logger.warning("Image data at index %d is not a string, got %s", i, type(img_data).__name__)
                     continue
                     
                 if img_data.startswith("data:image/"):
-                    print(f"[DEBUG] Saving base64 image {i}")
-                    # Save base64 image to temporary file
-                    img_path = self._save_base64_image(img_data, f"chat_img_{uuid.uuid4()}")
-                    if img_path:
-                        images.append({
-                            "data": img_path,
-                            "caption": f"Chat image {i+1}",
-                            "figure_id": f"chat_{message.timestamp.isoformat()}_{i}"
-                        })
-                        print(f"[DEBUG] Saved image {i} to: {img_path}")
+                    pending.append((img_data, "chat_img", f"Chat image {i+1}", f"chat_{timestamp}_{i}"))
                 else:
-                    print(f"[DEBUG] Image {i} is not base64 data URL, skipping")
-        else:
-            print(f"[DEBUG] No user_images found in metadata")
+                    logger.debug("Image %d is not a base64 data URL, skipping", i)
         
         # Extract from content (base64 data URLs)
-        print(f"[DEBUG] Checking content for base64 images...")
-        import re
-        img_pattern = re.compile(r'data:image/[^;]+;base64,([A-Za-z0-9+/=]+)')
-        matches = list(img_pattern.finditer(message.content))
-        print(f"[DEBUG] Found {len(matches)} base64 images in content")
-        
-        for i, match in enumerate(matches):
-            print(f"[DEBUG] Processing content image {i}")
+        for i, match in enumerate(_IMG_DATA_URL_RE.finditer(message.content)):
             img_data = f"data:image/png;base64,{match.group(1)}"
-            img_path = self._save_base64_image(img_data, f"content_img_{uuid.uuid4()}")
+            pending.append((img_data, "content_img", f"Content image {i+1}", f"content_{timestamp}_{i}"))
+        
+        # Save base64 images to temporary files, in parallel when there are several
+        if len(pending) > 1:
+            paths = list(_IMAGE_IO_POOL.map(lambda task: self._save_base64_image(task[0], task[1]), pending))
+        else:
+            paths = [self._save_base64_image(img_data, prefix) for img_data, prefix, _, _ in pending]
+        
+        for (_, _, caption, figure_id), img_path in zip(pending, paths):
             if img_path:
                 images.append({
                     "data": img_path,
-                    "caption": f"Content image {i+1}",
-                    "figure_id": f"content_{message.timestamp.isoformat()}_{i}"
+                    "caption": caption,
+                    "figure_id": figure_id
                 })
-                print(f"[DEBUG] Saved content image {i} to: {img_path}")
+                logger.debug("Saved %s to: %s", figure_id, img_path)
         
-        print(f"[DEBUG] Total images extracted: {len(images)}")
+        logger.debug("Total images extracted: %d", len(images))
         return images
     
-    def _save_base64_image(self, img_data: str, filename: str) -> Optional[str]:
-        """Save base64 image to temporary file and return path"""
+    def _save_base64_image(self, img_data: str, prefix: str) -> Optional[str]:
+        """Save base64 image to a content-addressed temporary file and return path"""
         try:
             # Create temp directory
             temp_dir = Path("temp_chat_images")
             temp_dir.mkdir(exist_ok=True)
             
-            # Decode base64
-            header, data = img_data.split(",", 1)
-            img_bytes = base64.b64decode(data)
+            # Locate the payload without copying it out of the data URL
+            comma = img_data.find(",")
+            if comma == -1:
+                raise ValueError("not a base64 data URL")
+            header = img_data[:comma]
+            start = comma + 1
             
             # Determine file extension
             if "jpeg" in header or "jpg" in header:
@@ -166,16 +201,86 @@ class ChatEmbeddingService:
             else:
                 ext = ".png"  # default
             
-            # Save file
-            file_path = temp_dir / f"{filename}{ext}"
-            with open(file_path, "wb") as f:
-                f.write(img_bytes)
+            # Name the file after a hash of the encoded payload, so an image that was
+            # already saved is found without decoding or writing it again
+            digest = sha1()
+            for offset in range(start, len(img_data), _B64_CHUNK_CHARS):
+                digest.update(img_data[offset:offset + _B64_CHUNK_CHARS].encode("ascii"))
+            file_path = temp_dir / f"{prefix}_{digest.hexdigest()}{ext}"
+            if file_path.exists():
+                return str(file_path)
+            
+            # Decode and write in fixed-size slices so peak memory stays bounded;
+            # write to a private temp name first so concurrent saves never expose a partial file
+            tmp_path = file_path.with_name(f"{file_path.name}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as f:
+                try:
+                    for offset in range(start, len(img_data), _B64_CHUNK_CHARS):
+                        f.write(binascii.a2b_base64(img_data[offset:offset + _B64_CHUNK_CHARS]))
+                except binascii.Error:
+                    # Embedded whitespace can split a quad across slices; decode in one go
+                    f.seek(0)
+                    f.truncate()
+                    f.write(base64.b64decode(img_data[start:]))
+            os.replace(tmp_path, file_path)
             
             return str(file_path)
         except Exception as e:
-            print(f"[ERROR] Failed to save base64 image: {e}")
+            logger.error("Failed to save base64 image: %s", e)
             return None
     
+    def _prepare_message(self, message_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the embedding chunk (text, extracted images, metadata) for a message"""
+        message_id = message_data["message_id"]
+        content = message_data["content"]
+        has_images = message_data["has_images"]
+        
+        logger.debug(
+            "Preparing message %s (role=%s, has_images=%s, content_length=%d)",
+            message_id,
+            message_data["role"],
+            has_images,
+            len(content),
+        )
+        
+        # Create a ChatMessage object for processing
+        message = ChatMessage(
+            role=message_data["role"],
+            content=content,
+            timestamp=message_data["timestamp"],
+            metadata=message_data["metadata"]
+        )
+        
+        # Extract images if present
+        images = []
+        if has_images:
+            try:
+                images = self._extract_images_from_message(message)
+            except Exception:
+                logger.error("Failed to extract images from message %s", message_id, exc_info=True)
+                # Continue without images
+                images = []
+        
+        # Create chunk-like structure for embedding
+        return {
+            "text": content,
+            "images": images,
+            "metadata": {
+                "message_id": message_id,
+                "session_id": message_data["session_id"],
+                "user_id": message_data["user_id"],
+                "role": message_data["role"],
+                "timestamp": message_data["timestamp"].isoformat(),
+                "source": "chat_message"
+            }
+        }
+    
+    async def startup(self):
+        """Initialize the persistent store once; called from the application startup hook"""
+        if self.persistent_store is None:
+            self.persistent_store = PersistentVectorStore(collection_name=self.embedding_collection_name)
+        await self.persistent_store.initialize()
+    
     async def embed_message(self, message_data: Dict[str, Any]) -> bool:
         """Embed a single chat message"""
         try:
@@ -183,91 +288,25 @@ class ChatEmbeddingService:
             content = message_data["content"]
             has_images = message_data["has_images"]
             
-            print(f"[DEBUG] ===== START EMBEDDING MESSAGE {message_id} =====")
-            print(f"[DEBUG] Role: {message_data['role']}")
-            print(f"[DEBUG] Has images: {has_images}")
-            print(f"[DEBUG] Content length: {len(content)}")
-            print(f"[DEBUG] Message metadata keys: {list(message_data.get('metadata', {}).keys())}")
-            print(f"[DEBUG] Full metadata: {message_data.get('metadata', {})}")
-            
-            # Create a ChatMessage object for processing
-            print(f"[DEBUG] Creating ChatMessage object...")
-            message = ChatMessage(
-                role=message_data["role"],
-                content=content,
-                timestamp=message_data["timestamp"],
-                metadata=message_data["metadata"]
-            )
-            print(f"[DEBUG] ChatMessage created successfully")
-            
-            # Extract images if present
-            images = []
-            if has_images:
-                print(f"[DEBUG] Extracting images from message...")
-                try:
-                    images = self._extract_images_from_message(message)
-                    print(f"[DEBUG] Extracted {len(images)} images from message")
-                    for i, img in enumerate(images):
-                        print(f"[DEBUG] Image {i}: {img.get('data', 'NO_DATA')}")
-                except Exception as e:
-                    print(f"[ERROR] Failed to extract images from message: {e}")
-                    print(f"[ERROR] Exception type: {type(e)}")
-                    print(f"[ERROR] Exception args: {e.args}")
-                    import traceback
-                    print(f"[ERROR] Traceback: {traceback.format_exc()}")
-                    print(f"[ERROR] Message metadata: {message.metadata}")
-                    # Continue without images
-                    images = []
-            else:
-                print(f"[DEBUG] No images to extract (has_images=False)")
-            
-            # Create chunk-like structure for embedding
-            chunk = {
-                "text": content,
-                "images": images,
-                "metadata": {
-                    "message_id": message_id,
-                    "session_id": message_data["session_id"],
-                    "user_id": message_data["user_id"],
-                    "role": message_data["role"],
-                    "timestamp": message_data["timestamp"].isoformat(),
-                    "source": "chat_message"
-                }
-            }
+            chunk = self._prepare_message(message_data)
+            images = chunk["images"]
             
             # Embed the chunk
-            print(f"[DEBUG] Getting embedder...")
             embedder = self._get_embedder()
-            print(f"[DEBUG] Embedder obtained: {type(embedder)}")
             
             if has_images and images:
-                print(f"[DEBUG] Using image+text embedding with {len(images)} images")
                 try:
                     embedding = embedder.embed_chunks([chunk])[0]
-                    print(f"[DEBUG] Image+text embedding successful, length: {len(embedding)}")
-                except Exception as e:
-                    print(f"[ERROR] Image+text embedding failed: {e}")
-                    print(f"[ERROR] Exception type: {type(e)}")
-                    import traceback
-                    print(f"[ERROR] Traceback: {traceback.format_exc()}")
+                except Exception:
+                    logger.error("Image+text embedding failed for message %s", message_id, exc_info=True)
                     raise
             else:
-                print(f"[DEBUG] Using text-only embedding")
                 try:
-                    embedding = embedder.embed([content])[0]
-                    print(f"[DEBUG] Text-only embedding successful, length: {len(embedding)}")
-                except Exception as e:
-                    print(f"[ERROR] Text-only embedding failed: {e}")
-                    print(f"[ERROR] Exception type: {type(e)}")
-                    import traceback
-                    print(f"[ERROR] Traceback: {traceback.format_exc()}")
+                    embedding = self._embed_texts_cached([content])[0]
+                except Exception:
+                    logger.error("Text-only embedding failed for message %s", message_id, exc_info=True)
                     raise
             
-            # Initialize persistent store if needed
-            if self.persistent_store is None:
-                self.persistent_store = PersistentVectorStore(collection_name=self.embedding_collection_name)
-                await self.persistent_store.initialize()
-            
             # Store in persistent vector store
             try:
                 await self.persistent_store.add_embeddings(
@@ -275,55 +314,18 @@ class ChatEmbeddingService:
                     embeddings=[embedding],
                     metadatas=[chunk["metadata"]]
                 )
-                print(f"[DEBUG] Successfully stored embedding in persistent store for message {message_id}")
             except Exception as e:
-                print(f"[ERROR] Failed to store in persistent store: {e}")
+                logger.error("Failed to store in persistent store: %s", e)
             
             # MongoDB removed - embeddings are only stored in memory/vector store
             
-            print(f"[LOG] Successfully embedded message {message_id}")
+            logger.debug("Embedded message %s", message_id)
             return True
             
         except Exception as e:
-            print(f"[ERROR] Failed to embed message {message_data.get('message_id', 'unknown')}: {e}")
+            logger.error("Failed to embed message %s: %s", message_data.get("message_id", "unknown"), e)
             return False
     
-    def _update_vector_store(self, chunks: List[Dict[str, Any]], embeddings: List[List[float]]):
-        """Update the in-memory vector store with new embeddings"""
-        try:
-            if not chunks or not embeddings:
-                return
-            
-            # Convert to numpy arrays
-            new_vectors = np.array(embeddings)
-            new_metadatas = [chunk["metadata"] for chunk in chunks]
-            
-            if self.vector_store.dense_vectors.size == 0:
-                # First embeddings
-                self.vector_store.dense_vectors = new_vectors
-                self.vector_store.metadatas = new_metadatas
-            else:
-                # Append to existing
-                self.vector_store.dense_vectors = np.vstack([
-                    self.vector_store.dense_vectors, 
-                    new_vectors
-                ])
-                self.vector_store.metadatas.extend(new_metadatas)
-            
-            # Update TF-IDF matrix
-            from sklearn.feature_extraction.text import TfidfVectorizer
-            all_texts = [meta.get("text", "") for meta in self.vector_store.metadatas]
-            
-            if all_texts:
-                tfidf = TfidfVectorizer(max_features=50000, ngram_range=(1, 2))
-                self.vector_store.tfidf_matrix = tfidf.fit_transform(all_texts)
-                self.vector_store.tfidf_vectorizer = tfidf
-            
-            print(f"[LOG] Updated vector store with {len(chunks)} new embeddings")
-            
-        except Exception as e:
-            print(f"[ERROR] Failed to update vector store: {e}")
-    
     async def embed_unembedded_messages(self, limit: int = 50) -> Dict[str, Any]:
         """Embed all unembedded chat messages"""
         try:
@@ -340,12 +342,52 @@ class ChatEmbeddingService:
             processed = 0
             failed = 0
             
+            # Split into text-only and image-bearing chunks so each group
+            # goes through the embedder in a single batch
+            text_chunks: List[Dict[str, Any]] = []
+            image_chunks: List[Dict[str, Any]] = []
             for message_data in unembedded:
-                success = await self.embed_message(message_data)
-                if success:
-                    processed += 1
-                else:
+                try:
+                    chunk = self._prepare_message(message_data)
+                except Exception as e:
+                    logger.error("Failed to prepare message %s: %s", message_data.get("message_id", "unknown"), e)
                     failed += 1
+                    continue
+                if message_data["has_images"] and chunk["images"]:
+                    image_chunks.append(chunk)
+                else:
+                    text_chunks.append(chunk)
+            
+            embedder = self._get_embedder()
+            chunks: List[Dict[str, Any]] = []
+            embeddings: List[List[float]] = []
+            
+            if text_chunks:
+                try:
+                    embeddings.extend(self._embed_texts_cached([chunk["text"] for chunk in text_chunks]))
+                    chunks.extend(text_chunks)
+                except Exception as e:
+                    logger.error("Text-only batch embedding failed: %s", e)
+                    failed += len(text_chunks)
+            
+            if image_chunks:
+                try:
+                    embeddings.extend(embedder.embed_chunks(image_chunks))
+                    chunks.extend(image_chunks)
+                except Exception as e:
+                    logger.error("Image+text batch embedding failed: %s", e)
+                    failed += len(image_chunks)
+            
+            if chunks:
+                try:
+                    await self.persistent_store.add_embeddings(
+                        texts=[chunk["text"] for chunk in chunks],
+                        embeddings=embeddings,
+                        metadatas=[chunk["metadata"] for chunk in chunks]
+                    )
+                except Exception as e:
+                    logger.error("Failed to store in persistent store: %s", e)
+                processed = len(chunks)
             
             return {
                 "status": "success",
@@ -366,11 +408,6 @@ class ChatEmbeddingService:
     async def search_chat_history(self, query: str, top_k: int = 5, image: str = None) -> List[Dict[str, Any]]:
         """Search chat history using the vector store"""
         try:
-            # Initialize persistent store if needed
-            if self.persistent_store is None:
-                self.persistent_store = PersistentVectorStore(collection_name=self.embedding_collection_name)
-                await self.persistent_store.initialize()
-            
             memory_store = self.persistent_store.get_memory_store()
             if not memory_store or memory_store.dense_vectors.size == 0:
                 return []
@@ -380,11 +417,11 @@ class ChatEmbeddingService:
             if image:
                 query_embedding = embedder.encode_query(image=image, text=query)
             else:
-                query_embedding = embedder.embed([query])[0]
+                query_embedding = self._embed_texts_cached([query])[0]
             
-            # Search using dense similarity
-            query_vec = np.array(query_embedding)
-            hits = memory_store.dense_search(query_vec, top_k)
+            # Search using dense similarity (the store normalizes the query)
+            query_vec = np.asarray(query_embedding, dtype=np.float32)
+            hits = self.persistent_store.dense_search(query_vec, top_k)
             
             results = []
             for idx, score in hits:
@@ -404,7 +441,7 @@ class ChatEmbeddingService:
             return results
             
         except Exception as e:
-            print(f"[ERROR] Failed to search chat history: {e}")
+            logger.error("Failed to search chat history: %s", e)
             return []
     
     def get_vector_store(self) -> InMemoryVectorStore:
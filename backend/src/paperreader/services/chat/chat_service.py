@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional, Dict, Any
 import uuid
 
@@ -11,31 +12,66 @@ from paperreader.models.chat import (
 )
 from paperreader.services.chat import repository as chat_repository
 
+# Number of most recent messages echoed back after an append. Callers that
+# need the full transcript should use ``get_session``.
+RECENT_K = 20
+
+
+# Documents read back from our own collections are trusted, so sessions and
+# messages are rebuilt with model_construct rather than re-validated per read.
+def _message_from_doc(msg: Dict[str, Any]) -> ChatMessage:
+    """Build a ChatMessage from a stored message document without re-validating it."""
+    return ChatMessage.model_construct(
+        role=msg.get("role"),
+        content=msg.get("content"),
+        metadata=msg.get("metadata"),
+        timestamp=msg.get("created_at"),
+    )
+
+
+def _session_from_doc(session_doc: Dict[str, Any]) -> ChatSession:
+    """Build a ChatSession from a stored session document (system messages are filtered by the queries)."""
+    messages = [_message_from_doc(msg) for msg in session_doc.get("messages", [])]
+    return ChatSession.model_construct(
+        session_id=session_doc["session_id"],
+        user_id=session_doc.get("user_id"),
+        title=None,
+        metadata=session_doc.get("metadata") or {},
+        messages=messages,
+        created_at=session_doc.get("created_at"),
+        updated_at=session_doc.get("updated_at"),
+        message_count=session_doc.get("message_count"),
+    )
+
 
 class ChatService:
     async def create_session(self, session_data: ChatSessionCreate) -> ChatSession:
         metadata = session_data.metadata or {}
         session_id = session_data.session_id or str(uuid.uuid4())
 
+        initial_messages = []
+        if session_data.initial_message:
+            initial_messages.append({"role": "user", "content": session_data.initial_message})
+
         doc = await chat_repository.create_session(
             session_id=session_id,
             user_id=session_data.user_id,
             title=None,
             metadata=metadata,
+            initial_messages=initial_messages,
         )
 
-        if session_data.initial_message:
-            await self.add_message(
-                session_id,
-                ChatMessageCreate(role="user", content=session_data.initial_message),
-            )
-
-        return await self.get_session(session_id) or ChatSession(
-            session_id=session_id,
-            user_id=session_data.user_id,
+        # The inserts were acknowledged; build the result from what was written
+        # instead of reading the document straight back.
+        return ChatSession.new(
+            session_id,
+            session_data.user_id,
             title=None,
-            metadata=metadata,
-            messages=[],
+            metadata=doc.get("metadata") or {},
+            messages=[_message_from_doc(msg) for msg in doc["messages"]],
+            created_at=doc["created_at"],
+            updated_at=doc["updated_at"],
+            message_count=doc["message_count"],
         )
 
     async def get_session(self, session_id: str) -> Optional[ChatSession]:
@@ -43,63 +79,110 @@ class ChatService:
         if not session_doc:
             return None
 
-        messages = [
-            ChatMessage(
-                role=msg.get("role"),
-                content=msg.get("content"),
-                metadata=msg.get("metadata"),
-                timestamp=msg.get("created_at"),
-            )
-            for msg in session_doc.get("messages", [])
-            if msg.get("role") != "system"
-        ]
-
-        return ChatSession(
-            session_id=session_doc["session_id"],
-            user_id=session_doc.get("user_id"),
-            title=None,
-            metadata=session_doc.get("metadata") or {},
-            messages=messages,
-            created_at=session_doc.get("created_at"),
-            updated_at=session_doc.get("updated_at"),
-        )
+        return _session_from_doc(session_doc)
 
-    async def add_message(self, session_id: str, message: ChatMessageCreate) -> Optional[ChatSession]:
+    async def add_message(
+        self,
+        session_id: str,
+        message: ChatMessageCreate,
+        session: Optional[ChatSession] = None,
+    ) -> Optional[ChatSession]:
+        """
+        Append a message and return the session it belongs to.
+
+        Callers that already hold the session can pass it in; the stored
+        message is then appended to a copy of it instead of reading the
+        session back. Otherwise the last ``RECENT_K`` messages are loaded.
+        Returns None, without storing anything, if the session does not exist.
+        """
         if message.role == "system":
-            return await self.get_session(session_id)
+            return session or await self.get_session_tail(session_id, RECENT_K)
 
-        await chat_repository.append_message(
+        doc = await chat_repository.append_message(
             session_id=session_id,
             role=message.role,
             content=message.content,
             metadata=message.metadata,
         )
-        return await self.get_session(session_id)
-
-    async def get_session_messages(self, session_id: str, limit: Optional[int] = None) -> List[ChatMessage]:
-        messages = await chat_repository.get_recent_messages(session_id, limit or 0)
-        return [
-            ChatMessage(
-                role=msg.get("role"),
-                content=msg.get("content"),
-                metadata=msg.get("metadata"),
-                timestamp=msg.get("created_at"),
-            )
-            for msg in messages
-            if msg.get("role") != "system"
-        ]
+        if doc is None:
+            return None
+        if session is None:
+            return await self.get_session_tail(session_id, RECENT_K)
+        update: Dict[str, Any] = {
+            "messages": [*session.messages, _message_from_doc(doc)],
+            "updated_at": doc["created_at"],
+        }
+        if session.message_count is not None:
+            update["message_count"] = session.message_count + 1
+        return session.model_copy(update=update)
+
+    async def add_messages(
+        self,
+        session_id: str,
+        messages: List[ChatMessageCreate],
+        session: Optional[ChatSession] = None,
+    ) -> Optional[ChatSession]:
+        """
+        Append several messages in one batch; system messages are not stored.
+
+        As with ``add_message``, a session the caller already holds is
+        extended with the stored messages instead of being read back.
+        """
+        docs = await chat_repository.append_messages_bulk(
+            session_id,
+            [
+                {"role": message.role, "content": message.content, "metadata": message.metadata}
+                for message in messages
+                if message.role != "system"
+            ],
+        )
+        if docs is None:
+            return None
+        if session is None:
+            return await self.get_session_tail(session_id, RECENT_K)
+        if not docs:
+            return session
+        update: Dict[str, Any] = {
+            "messages": [*session.messages, *(_message_from_doc(doc) for doc in docs)],
+            "updated_at": docs[-1]["created_at"],
+        }
+        if session.message_count is not None:
+            update["message_count"] = session.message_count + len(docs)
+        return session.model_copy(update=update)
+
+    async def get_session_tail(self, session_id: str, k: int = RECENT_K) -> Optional[ChatSession]:
+        """Return the session with only its last ``k`` non-system messages loaded."""
+        session_doc = await chat_repository.get_session_tail(session_id, k)
+        if not session_doc:
+            return None
+
+        return _session_from_doc(session_doc)
+
+    async def get_session_messages(
+        self,
+        session_id: str,
+        limit: Optional[int] = None,
+        before: Optional[datetime] = None,
+    ) -> List[ChatMessage]:
+        messages = await chat_repository.get_recent_messages(session_id, limit or 0, before)
+        return [_message_from_doc(msg) for msg in messages]
 
     async def get_recent_messages(self, session_id: str, limit: int = 10) -> List[ChatMessage]:
         return await self.get_session_messages(session_id, limit)
 
-    async def delete_session(self, session_id: str) -> None:
-        await chat_repository.delete_session(session_id)
+    async def delete_session(self, session_id: str) -> bool:
+        return await chat_repository.delete_session(session_id)
+
+    async def purge_user_sessions(self, user_id: str, older_than_days: int) -> int:
+        """Delete a user's sessions that have not been updated for ``older_than_days`` days."""
+        older_than = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        return await chat_repository.purge_user_sessions(user_id, older_than)
 
     async def list_user_sessions(self, user_id: str, limit: int = 20) -> List[ChatSessionResponse]:
-        sessions = await chat_repository.list_sessions(user_id, limit)
+        sessions = await chat_repository.list_sessions_with_preview(user_id, limit, message_limit=5)
         responses: List[ChatSessionResponse] = []
         for session in sessions:
-            messages = await self.get_session_messages(session["session_id"], limit=5)
+            messages = [_message_from_doc(msg) for msg in session.get("messages", [])]
             responses.append(
                 ChatSessionResponse(
                     session_id=session["session_id"],
@@ -107,7 +190,9 @@ class ChatService:
                     messages=messages,
                     created_at=session.get("created_at"),
                     updated_at=session.get("updated_at"),
-                    message_count=len(messages),
+                    # Sessions created before message_count was tracked fall back
+                    # to the preview length
+                    message_count=session.get("message_count", len(messages)),
                     metadata=session.get("metadata") or {},
                 )
             )
@@ -117,13 +202,22 @@ class ChatService:
         session = await self.get_session(session_id)
         if not session:
             return None
+        return self.to_session_response(session)
+
+    @staticmethod
+    def to_session_response(session: ChatSession) -> ChatSessionResponse:
+        """Build the API response for a session that is already loaded."""
         return ChatSessionResponse(
             session_id=session.session_id,
             title=session.title,
             messages=session.messages,
             created_at=session.created_at,
             updated_at=session.updated_at,
-            message_count=len(session.messages),
+            # Sessions created before message_count was tracked fall back to
+            # the loaded messages, which is the whole history for these reads
+            message_count=(
+                session.message_count if session.message_count is not None else len(session.messages)
+            ),
             metadata=session.metadata or {},
         )
 
@@ -147,26 +241,7 @@ class ChatService:
         if not session_doc:
             return None
 
-        messages = [
-            ChatMessage(
-                role=msg.get("role"),
-                content=msg.get("content"),
-                metadata=msg.get("metadata"),
-                timestamp=msg.get("created_at"),
-            )
-            for msg in session_doc.get("messages", [])
-            if msg.get("role") != "system"
-        ]
-
-        return ChatSession(
-            session_id=session_doc["session_id"],
-            user_id=session_doc.get("user_id"),
-            title=None,
-            metadata=session_doc.get("metadata") or {},
-            messages=messages,
-            created_at=session_doc.get("created_at"),
-            updated_at=session_doc.get("updated_at"),
-        )
+        return _session_from_doc(session_doc)
 
 
 chat_service = ChatService()
@@ -1,20 +1,187 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import asyncio
+import copy
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorCollection
 from bson import ObjectId
+from bson.codec_options import TypeDecoder, TypeRegistry
+from pymongo import UpdateOne
+from pymongo.write_concern import WriteConcern
 
 from paperreader.database.mongodb import mongodb
 
+logger = logging.getLogger(__name__)
+
+
+# Chat messages are append-only history, so by default inserts are
+# acknowledged once applied in memory rather than after the journal flush.
+# Set CHAT_MESSAGES_JOURNAL=1 to wait for the journal as well. Session headers
+# keep the server's default write concern.
+_MESSAGES_WRITE_CONCERN = WriteConcern(
+    w=1,
+    j=os.getenv("CHAT_MESSAGES_JOURNAL", "0").lower() in {"1", "true", "yes"},
+    wtimeout=int(os.getenv("CHAT_MESSAGES_WTIMEOUT_MS", "2000")),
+)
+
+
+class _ObjectIdToStr(TypeDecoder):
+    """Decode BSON ObjectIds straight to strings so chat reads are JSON-ready."""
+
+    bson_type = ObjectId
+
+    def transform_bson(self, value: ObjectId) -> str:
+        return str(value)
+
+
+# Chat documents only ever leave the repository as JSON, so ObjectIds (in
+# metadata such as document_id) are turned into strings by the BSON decoder
+# rather than by walking every decoded document in Python. Encoding is not
+# affected: queries can still match on ObjectId values.
+_CHAT_TYPE_REGISTRY = TypeRegistry([_ObjectIdToStr()])
+
+
+def _with_chat_codec(collection: AsyncIOMotorCollection) -> AsyncIOMotorCollection:
+    # Derive from the client's options so uuid/tz settings are kept
+    codec_options = collection.codec_options.with_options(type_registry=_CHAT_TYPE_REGISTRY)
+    return collection.with_options(codec_options=codec_options)
+
+
+# (database, sessions, messages) for the current
+# connection. Resolved once so hot paths skip the write-concern keyed lookup
+# in mongodb.get_collection; a reconnect swaps the database and rebuilds it.
+_handles: Optional[Tuple[Any, AsyncIOMotorCollection, AsyncIOMotorCollection]] = None
+
+
+def _collection_handles() -> Tuple[Any, AsyncIOMotorCollection, AsyncIOMotorCollection]:
+    global _handles
+    database = mongodb.database
+    if _handles is None or _handles[0] is not database:
+        _handles = (
+            database,
+            _with_chat_codec(mongodb.get_collection("chat_sessions")),
+            _with_chat_codec(
+                mongodb.get_collection("chat_messages", write_concern=_MESSAGES_WRITE_CONCERN)
+            ),
+        )
+    return _handles
+
 
 def _sessions_collection() -> AsyncIOMotorCollection:
-    return mongodb.get_collection("chat_sessions")
+    return _collection_handles()[1]
 
 
 def _messages_collection() -> AsyncIOMotorCollection:
-    return mongodb.get_collection("chat_messages")
+    return _collection_handles()[2]
+
+
+# Opt-in, short-lived read-through cache for full session reads. Every write
+# below goes through _invalidate_session, but only in this process: with
+# several workers a write made in one worker is seen by the others only once
+# their entry expires. It is therefore off unless CHAT_SESSION_CACHE_TTL is
+# set to a positive number of seconds, which is only safe for single-worker
+# deployments.
+_SESSION_CACHE_MAX = int(os.getenv("CHAT_SESSION_CACHE_SIZE", "2048"))
+_SESSION_CACHE_TTL = float(os.getenv("CHAT_SESSION_CACHE_TTL", "0"))
+_SESSION_CACHE_ENABLED = _SESSION_CACHE_MAX > 0 and _SESSION_CACHE_TTL > 0
+_session_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# In-flight loads, so concurrent readers of one session share a single query
+_session_loads: Dict[str, "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+
+
+def _invalidate_session(session_id: str) -> None:
+    _session_cache.pop(session_id, None)
+    # A load that started before the write must not repopulate the cache
+    _session_loads.pop(session_id, None)
+
+
+def _cached_session(session_id: str) -> Optional[Dict[str, Any]]:
+    if not _SESSION_CACHE_ENABLED:
+        return None
+    entry = _session_cache.get(session_id)
+    if entry is None:
+        return None
+    expires_at, session = entry
+    if expires_at < time.monotonic():
+        del _session_cache[session_id]
+        return None
+    _session_cache.move_to_end(session_id)
+    return session
+
+
+def _copy_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Deep copy, so callers never share message dicts or metadata with a cached or shared load."""
+    return copy.deepcopy(session)
+
+
+async def create_chat_indexes() -> None:
+    """
+    Create indexes for the chat_sessions and chat_messages collections.
+    Should be called during application startup.
+    """
+    sessions = _sessions_collection()
+    messages = _messages_collection()
+
+    await asyncio.gather(
+        # Point lookups, updates and deletes by session id
+        sessions.create_index([("session_id", 1)], unique=True, background=True),
+        # Per-user session listing, served in updated_at order
+        sessions.create_index([("user_id", 1), ("updated_at", -1)], background=True),
+        # Document-scoped session lookups and deletes, newest first
+        sessions.create_index([("metadata.document_id", 1), ("updated_at", -1)], background=True),
+        # Per-session history in either direction (full reads ascend, recent
+        # and preview reads walk the same index backwards)
+        messages.create_index([("session_id", 1), ("created_at", 1)], background=True),
+    )
+
+    logger.info("Created indexes for chat_sessions and chat_messages")
+
+    await _backfill_message_counts(sessions, messages)
+
+
+async def _backfill_message_counts(
+    sessions: AsyncIOMotorCollection,
+    messages: AsyncIOMotorCollection,
+) -> None:
+    """
+    Set ``message_count`` on sessions written before the field existed.
+
+    Appends maintain the counter with ``$inc``, which would start legacy
+    sessions from zero. Only sessions still missing the field are counted,
+    so after the first startup this is one query that matches nothing.
+    """
+    cursor = sessions.find({"message_count": {"$exists": False}}, {"_id": 0, "session_id": 1})
+    session_ids = [doc["session_id"] async for doc in cursor]
+    if not session_ids:
+        return
+
+    for start in range(0, len(session_ids), _DELETE_BATCH_SIZE):
+        batch = session_ids[start:start + _DELETE_BATCH_SIZE]
+        counts = {
+            doc["_id"]: doc["count"]
+            async for doc in messages.aggregate([
+                {"$match": {"session_id": {"$in": batch}}},
+                {"$group": {"_id": "$session_id", "count": {"$sum": 1}}},
+            ])
+        }
+        await sessions.bulk_write(
+            [
+                UpdateOne(
+                    {"session_id": session_id, "message_count": {"$exists": False}},
+                    {"$set": {"message_count": counts.get(session_id, 0)}},
+                )
+                for session_id in batch
+            ],
+            ordered=False,
+        )
+
+    logger.info("Backfilled message_count on %s chat sessions", len(session_ids))
 
 
 async def create_session(
@@ -23,84 +190,267 @@ async def create_session(
     user_id: Optional[str],
     title: Optional[str],
     metadata: Optional[Dict[str, Any]] = None,
+    initial_messages: Optional[List[Dict[str, Any]]] = None,
 ) -> Dict[str, Any]:
-    now = datetime.utcnow()
+    """
+    Insert a session header, optionally together with its first messages.
+
+    ``initial_messages`` items need ``role`` and ``content`` and may carry
+    ``metadata``. They are inserted alongside the header in the same round
+    trip and returned under ``messages`` in the result.
+    """
+    now = datetime.now(timezone.utc)
+    messages = [
+        {
+            "session_id": session_id,
+            "role": message["role"],
+            "content": message["content"],
+            "metadata": message.get("metadata") or {},
+            "created_at": now + timedelta(milliseconds=offset),
+        }
+        for offset, message in enumerate(initial_messages or [])
+    ]
     doc = {
         "session_id": session_id,
         "user_id": user_id,
         "title": title,
         "metadata": metadata or {},
+        "message_count": len(messages),
         "created_at": now,
-        "updated_at": now,
+        "updated_at": messages[-1]["created_at"] if messages else now,
     }
-    result = await _sessions_collection().insert_one(doc)
+    if messages:
+        result, _ = await asyncio.gather(
+            _sessions_collection().insert_one(doc),
+            _messages_collection().insert_many(messages, ordered=False),
+        )
+        for message in messages:
+            message["_id"] = str(message["_id"])
+    else:
+        result = await _sessions_collection().insert_one(doc)
+    _invalidate_session(session_id)
     doc["_id"] = str(result.inserted_id)
+    doc["messages"] = messages
     return doc
 
 
 async def update_session_metadata(session_id: str, metadata: Dict[str, Any]) -> None:
     await _sessions_collection().update_one(
         {"session_id": session_id},
-        {"$set": {"metadata": metadata, "updated_at": datetime.utcnow()}},
+        {"$set": {"metadata": metadata, "updated_at": datetime.now(timezone.utc)}},
     )
+    _invalidate_session(session_id)
 
 
-def _convert_objectids_to_strings(obj: Any) -> Any:
-    """Recursively convert ObjectId instances to strings for JSON serialization"""
-    if isinstance(obj, ObjectId):
-        return str(obj)
-    elif isinstance(obj, dict):
-        return {k: _convert_objectids_to_strings(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_convert_objectids_to_strings(item) for item in obj]
-    elif isinstance(obj, tuple):
-        return tuple(_convert_objectids_to_strings(item) for item in obj)
-    return obj
+async def get_session(
+    session_id: str,
+    max_messages: int = 0,
+) -> Optional[Dict[str, Any]]:
+    """
+    Load a session with its messages, oldest first.
 
+    The default ``max_messages=0`` loads the whole history, which is what the
+    session endpoints return; a positive bound keeps only the newest messages.
+    Only full loads are cached.
+    """
+    if max_messages:
+        return await _load_session(session_id, max_messages)
+
+    cached = _cached_session(session_id)
+    if cached is not None:
+        return _copy_session(cached)
+
+    pending = _session_loads.get(session_id)
+    if pending is None:
+        pending = asyncio.ensure_future(_load_session(session_id, max_messages))
+        _session_loads[session_id] = pending
+        try:
+            session = await asyncio.shield(pending)
+        finally:
+            loaded_here = _session_loads.get(session_id) is pending
+            if loaded_here:
+                del _session_loads[session_id]
+        if session is not None and loaded_here and _SESSION_CACHE_ENABLED:
+            _session_cache[session_id] = (time.monotonic() + _SESSION_CACHE_TTL, session)
+            _session_cache.move_to_end(session_id)
+            while len(_session_cache) > _SESSION_CACHE_MAX:
+                _session_cache.popitem(last=False)
+    else:
+        session = await asyncio.shield(pending)
+
+    return _copy_session(session) if session is not None else None
+
+
+async def _load_session(session_id: str, max_messages: int) -> Optional[Dict[str, Any]]:
+    return await _find_session_with_messages({"session_id": session_id}, max_messages)
+
+
+_SESSION_HEADER_PROJECTION = {
+    "session_id": 1,
+    "user_id": 1,
+    "title": 1,
+    "metadata": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "message_count": 1,
+    "_id": 0,
+}
+# Callers address sessions and messages by session_id, never by Mongo _id,
+# so reads drop it on the server instead of stringifying it per document
+_SESSION_READ_PROJECTION = {"_id": 0}
+_MESSAGE_PROJECTION = {"_id": 0}
+
+
+def _recent_messages_lookup(limit: int) -> Dict[str, Any]:
+    """``$lookup`` stage joining a session's last ``limit`` non-system messages, newest first."""
+    pipeline: List[Dict[str, Any]] = [
+        {
+            "$match": {
+                "$expr": {"$eq": ["$session_id", "$$sid"]},
+                "role": {"$ne": "system"},
+            }
+        },
+        {"$sort": {"created_at": -1}},
+    ]
+    if limit > 0:
+        pipeline.append({"$limit": limit})
+    pipeline.append({"$project": _MESSAGE_PROJECTION})
+    return {
+        "$lookup": {
+            "from": "chat_messages",
+            "let": {"sid": "$session_id"},
+            "pipeline": pipeline,
+            "as": "messages",
+        }
+    }
 
-async def get_session(session_id: str) -> Optional[Dict[str, Any]]:
-    session = await _sessions_collection().find_one({"session_id": session_id})
-    if not session:
-        return None
 
-    messages_cursor = (
-        _messages_collection()
-        .find({"session_id": session_id})
-        .sort("created_at", 1)
-    )
-    messages = await messages_cursor.to_list(length=None)
-    for msg in messages:
-        msg["_id"] = str(msg.get("_id"))
-        # Convert ObjectIds in metadata
-        if "metadata" in msg and isinstance(msg["metadata"], dict):
-            msg["metadata"] = _convert_objectids_to_strings(msg["metadata"])
-    session["_id"] = str(session.get("_id"))
-    # Convert ObjectIds in session metadata
-    if "metadata" in session and isinstance(session["metadata"], dict):
-        session["metadata"] = _convert_objectids_to_strings(session["metadata"])
+def _normalize_joined_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Put joined messages oldest first."""
+    messages = session.get("messages") or []
+    messages.reverse()
     session["messages"] = messages
     return session
 
 
-async def list_sessions(user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+async def _find_session_with_messages(
+    query: Dict[str, Any],
+    max_messages: int,
+    sort: Optional[Dict[str, int]] = None,
+    projection: Dict[str, int] = _SESSION_READ_PROJECTION,
+) -> Optional[Dict[str, Any]]:
+    """
+    Read one session matching ``query`` together with its recent messages.
+
+    The messages are joined with ``$lookup`` so the header and the history
+    arrive in a single round trip. ``sort`` picks which session wins when
+    several match; ``max_messages=0`` joins the whole history.
+    """
+    pipeline: List[Dict[str, Any]] = [{"$match": query}]
+    if sort:
+        pipeline.append({"$sort": sort})
+    pipeline += [
+        {"$limit": 1},
+        {"$project": projection},
+        _recent_messages_lookup(max_messages),
+    ]
+    sessions = await _sessions_collection().aggregate(pipeline).to_list(length=1)
+    if not sessions:
+        return None
+    return _normalize_joined_session(sessions[0])
+
+
+async def get_session_tail(session_id: str, k: int = 20) -> Optional[Dict[str, Any]]:
+    """
+    Load a session header together with only its last ``k`` messages.
+
+    Messages live in their own collection; the header and the bounded,
+    newest-first message tail are joined in one ``$lookup`` aggregation.
+    Use it on write paths that only need to echo the latest turns back;
+    ``get_session`` remains the way to read the full history.
+    """
+    cached = _cached_session(session_id)
+    if cached is not None:
+        # Deep-copy only the header and the slice handed out, never the
+        # cached message dicts themselves
+        messages = cached.get("messages", [])
+        header = {key: value for key, value in cached.items() if key != "messages"}
+        return copy.deepcopy({**header, "messages": messages[-k:] if k > 0 else []})
+
+    if k <= 0:
+        session = await _sessions_collection().find_one(
+            {"session_id": session_id},
+            projection=_SESSION_HEADER_PROJECTION,
+        )
+        if not session:
+            return None
+        session["messages"] = []
+        return session
+
+    return await _find_session_with_messages(
+        {"session_id": session_id},
+        k,
+        projection=_SESSION_HEADER_PROJECTION,
+    )
+
+
+async def list_sessions(
+    user_id: str,
+    limit: int = 20,
+    projection: Optional[Dict[str, int]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    List a user's most recently updated sessions.
+
+    ``projection`` narrows the returned fields, e.g. to leave out a large
+    ``metadata`` when the caller only needs ids and titles. It defaults to
+    the header fields, ``message_count`` included.
+    """
     cursor = (
         _sessions_collection()
-        .find({"user_id": user_id})
+        .find({"user_id": user_id}, projection=projection or _SESSION_HEADER_PROJECTION)
         .sort("updated_at", -1)
         .limit(limit)
     )
-    sessions = await cursor.to_list(length=limit)
-    for session in sessions:
-        session["_id"] = str(session.get("_id"))
-        # Convert ObjectIds in session metadata
-        if "metadata" in session and isinstance(session["metadata"], dict):
-            session["metadata"] = _convert_objectids_to_strings(session["metadata"])
-    return sessions
+    return await cursor.to_list(length=limit)
+
+
+async def list_sessions_with_preview(
+    user_id: str,
+    session_limit: int = 20,
+    message_limit: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    List a user's most recently updated sessions with their last few messages.
+
+    The previews are joined server-side with ``$lookup`` so the listing costs
+    one round trip instead of one extra ``find`` per session. Each session's
+    ``messages`` are returned oldest first, like ``get_recent_messages``.
+    """
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"updated_at": -1}},
+        {"$limit": session_limit},
+        {"$project": _SESSION_HEADER_PROJECTION},
+        _recent_messages_lookup(message_limit),
+    ]
+    sessions = await _sessions_collection().aggregate(pipeline).to_list(length=session_limit)
+    return [_normalize_joined_session(session) for session in sessions]
+
+
+async def delete_session(session_id: str) -> bool:
+    """Delete a session and its messages; returns whether the session existed."""
+    # The two deletes are independent, so overlap their round trips
+    result, _ = await asyncio.gather(
+        _sessions_collection().delete_one({"session_id": session_id}),
+        _messages_collection().delete_many({"session_id": session_id}),
+    )
+    _invalidate_session(session_id)
+    return result.deleted_count > 0
 
 
-async def delete_session(session_id: str) -> None:
-    await _sessions_collection().delete_one({"session_id": session_id})
-    await _messages_collection().delete_many({"session_id": session_id})
+# Upper bound on session ids per $in when deleting messages in bulk
+_DELETE_BATCH_SIZE = 1000
 
 
 async def delete_sessions_by_document(
@@ -134,35 +484,85 @@ async def delete_sessions_by_document(
         query = {"metadata.document_id": doc_id_str}
     
     # Find all matching sessions
-    sessions_cursor = _sessions_collection().find(query)
+    sessions_cursor = _sessions_collection().find(
+        query, projection={"session_id": 1, "_id": 0}
+    )
     sessions = await sessions_cursor.to_list(length=None)
+    session_ids = [session["session_id"] for session in sessions if session.get("session_id")]
     
-    deleted_count = 0
-    for session in sessions:
-        session_id = session.get("session_id")
-        if session_id:
-            # Delete messages for this session
-            await _messages_collection().delete_many({"session_id": session_id})
-            deleted_count += 1
+    # Delete their messages with one $in per batch instead of one call per session
+    for start in range(0, len(session_ids), _DELETE_BATCH_SIZE):
+        batch = session_ids[start:start + _DELETE_BATCH_SIZE]
+        await _messages_collection().delete_many({"session_id": {"$in": batch}})
     
     # Delete sessions
     result = await _sessions_collection().delete_many(query)
     deleted_sessions = result.deleted_count or 0
+    for session_id in session_ids:
+        _invalidate_session(session_id)
     
     if deleted_sessions > 0:
-        print(f"[Chat] ✅ Deleted {deleted_sessions} chat sessions and their messages (document_id={document_id})")
+        logger.info("✅ Deleted %s chat sessions and their messages (document_id=%s)", deleted_sessions, document_id)
     
     return deleted_sessions
 
 
+async def purge_user_sessions(user_id: str, older_than: datetime) -> int:
+    """
+    Delete a user's sessions last updated before ``older_than``, with their messages.
+
+    Messages carry no ``user_id``, so the matching session ids are read
+    first and handled in batches of ``_DELETE_BATCH_SIZE``: each batch is one
+    ``delete_many`` on sessions (re-checking ``updated_at``) and one on the
+    messages of the sessions that were actually removed, instead of a
+    ``delete_session`` call per id.
+
+    Returns:
+        Number of sessions deleted.
+    """
+    query = {"user_id": user_id, "updated_at": {"$lt": older_than}}
+    sessions = await (
+        _sessions_collection()
+        .find(query, projection={"session_id": 1, "_id": 0})
+        .to_list(length=None)
+    )
+    session_ids = [session["session_id"] for session in sessions if session.get("session_id")]
+
+    deleted_sessions = 0
+    for start in range(0, len(session_ids), _DELETE_BATCH_SIZE):
+        batch = session_ids[start:start + _DELETE_BATCH_SIZE]
+        result = await _sessions_collection().delete_many({**query, "session_id": {"$in": batch}})
+        deleted_sessions += result.deleted_count or 0
+        # A session touched since the find survives the re-checked delete;
+        # keep its messages too
+        survivors = await (
+            _sessions_collection()
+            .find({"session_id": {"$in": batch}}, projection={"session_id": 1, "_id": 0})
+            .to_list(length=None)
+        )
+        surviving_ids = {session["session_id"] for session in survivors}
+        deleted_ids = [session_id for session_id in batch if session_id not in surviving_ids]
+        if deleted_ids:
+            await _messages_collection().delete_many({"session_id": {"$in": deleted_ids}})
+        for session_id in batch:
+            _invalidate_session(session_id)
+
+    if deleted_sessions > 0:
+        logger.info("Purged %s chat sessions for user %s (updated before %s)", deleted_sessions, user_id, older_than)
+    return deleted_sessions
+
+
 async def append_message(
     *,
     session_id: str,
     role: str,
     content: str,
     metadata: Optional[Dict[str, Any]] = None,
-) -> Dict[str, Any]:
-    now = datetime.utcnow()
+) -> Optional[Dict[str, Any]]:
+    """
+    Append one message and touch its session; returns None if the session does not exist.
+    """
+    now = datetime.now(timezone.utc)
     doc = {
         "session_id": session_id,
         "role": role,
@@ -170,29 +570,100 @@ async def append_message(
         "metadata": metadata or {},
         "created_at": now,
     }
-    result = await _messages_collection().insert_one(doc)
-    await _sessions_collection().update_one(
-        {"session_id": session_id},
-        {"$set": {"updated_at": now}},
+    # The message insert and the session touch are independent, so issue them
+    # together and wait for one round trip instead of two. The touch does not
+    # upsert: appending to an unknown or deleted session must not create a
+    # header, so the stray message is removed again instead.
+    result, touched = await asyncio.gather(
+        _messages_collection().insert_one(doc),
+        _sessions_collection().update_one(
+            {"session_id": session_id},
+            {"$set": {"updated_at": now}, "$inc": {"message_count": 1}},
+        ),
     )
+    if touched.matched_count == 0:
+        await _messages_collection().delete_one({"_id": result.inserted_id})
+        logger.warning("Dropped message for unknown chat session %s", session_id)
+        return None
+    _invalidate_session(session_id)
     doc["_id"] = str(result.inserted_id)
     return doc
 
 
-async def get_recent_messages(session_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+async def append_messages_bulk(
+    session_id: str,
+    messages: List[Dict[str, Any]],
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Append several messages to a session with one insert and one session touch.
+
+    Returns None, with nothing stored, if the session does not exist.
+
+    Each item needs ``role`` and ``content`` and may carry ``metadata``.
+    Timestamps are spaced by a millisecond (BSON date precision) so the batch
+    keeps its order when read back by ``created_at``. The insert is
+    acknowledged like ``append_message``, so ``message_count`` only counts
+    messages that were written.
+    """
+    if not messages:
+        return []
+
+    now = datetime.now(timezone.utc)
+    docs = [
+        {
+            "session_id": session_id,
+            "role": message["role"],
+            "content": message["content"],
+            "metadata": message.get("metadata") or {},
+            "created_at": now + timedelta(milliseconds=offset),
+        }
+        for offset, message in enumerate(messages)
+    ]
+    _, touched = await asyncio.gather(
+        _messages_collection().insert_many(docs, ordered=False),
+        _sessions_collection().update_one(
+            {"session_id": session_id},
+            {
+                "$set": {"updated_at": docs[-1]["created_at"]},
+                "$inc": {"message_count": len(docs)},
+            },
+        ),
+    )
+    if touched.matched_count == 0:
+        await _messages_collection().delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        logger.warning("Dropped %s messages for unknown chat session %s", len(docs), session_id)
+        return None
+    _invalidate_session(session_id)
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    return docs
+
+
+async def get_recent_messages(
+    session_id: str,
+    limit: int = 10,
+    before: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Return the last ``limit`` non-system messages of a session, oldest first.
+
+    System messages are excluded on the server so the limit counts only the
+    turns callers keep. ``limit=0`` returns the whole history. ``before``
+    pages backwards: pass the ``created_at`` of the oldest message already
+    held to get the page preceding it, read from the same index.
+    """
+    query: Dict[str, Any] = {"session_id": session_id, "role": {"$ne": "system"}}
+    if before is not None:
+        query["created_at"] = {"$lt": before}
+
     cursor = (
         _messages_collection()
-        .find({"session_id": session_id})
+        .find(query, projection=_MESSAGE_PROJECTION)
         .sort("created_at", -1)
         .limit(limit)
     )
-    messages = await cursor.to_list(length=limit)
+    messages = await cursor.to_list(length=limit or None)
     messages.reverse()
-    for msg in messages:
-        msg["_id"] = str(msg.get("_id"))
-        # Convert ObjectIds in metadata
-        if "metadata" in msg and isinstance(msg["metadata"], dict):
-            msg["metadata"] = _convert_objectids_to_strings(msg["metadata"])
     return messages
 
 
@@ -219,29 +690,8 @@ async def find_session_by_document(
     if user_id:
         query["user_id"] = user_id
 
-    session = await _sessions_collection().find_one(
+    return await _find_session_with_messages(
         query,
-        sort=[("updated_at", -1)]
+        0,
+        sort={"updated_at": -1},
     )
-    
-    if not session:
-        return None
-    
-    # Load messages for this session
-    messages_cursor = (
-        _messages_collection()
-        .find({"session_id": session["session_id"]})
-        .sort("created_at", 1)
-    )
-    messages = await messages_cursor.to_list(length=None)
-    for msg in messages:
-        msg["_id"] = str(msg.get("_id"))
-        # Convert ObjectIds in metadata
-        if "metadata" in msg and isinstance(msg["metadata"], dict):
-            msg["metadata"] = _convert_objectids_to_strings(msg["metadata"])
-    session["_id"] = str(session.get("_id"))
-    # Convert ObjectIds in session metadata
-    if "metadata" in session and isinstance(session["metadata"], dict):
-        session["metadata"] = _convert_objectids_to_strings(session["metadata"])
-    session["messages"] = messages
-    return session
@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import base64
+import logging
 import uuid
 from pathlib import Path
 import os
@@ -10,6 +11,8 @@ import os
 from paperreader.models.chat import ChatSession, ChatMessage
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
 
 class SimpleChatEmbeddingService:
     """Simplified service to handle chat message storage without heavy embedding models"""
@@ -21,7 +24,7 @@ class SimpleChatEmbeddingService:
     async def get_unembedded_messages(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get chat messages that haven't been embedded yet"""
         # MongoDB removed - return empty list
-        print("[WARNING] SimpleChatEmbeddingService.get_unembedded_messages() called but MongoDB is disabled")
+        logger.warning("SimpleChatEmbeddingService.get_unembedded_messages() called but MongoDB is disabled")
         return []
     
     def _has_images_in_message(self, message: ChatMessage) -> bool:
@@ -43,7 +46,7 @@ class SimpleChatEmbeddingService:
     async def store_message_for_embedding(self, message_data: Dict[str, Any]) -> bool:
         """Store message data for later embedding (without actually embedding)"""
         # MongoDB removed - service disabled
-        print("[WARNING] SimpleChatEmbeddingService.store_message_for_embedding() called but MongoDB is disabled")
+        logger.warning("SimpleChatEmbeddingService.store_message_for_embedding() called but MongoDB is disabled")
         return False
     
     async def store_unembedded_messages(self, limit: int = 50) -> Dict[str, Any]:
@@ -5,6 +5,11 @@ import numpy as np
 from pathlib import Path
 import threading
 import os
+import contextlib
+import base64
+import tempfile
+import time
+import traceback
 import hashlib
 import pickle
 from paperreader.services.documents.minio_client import get_minio_client
@@ -73,6 +78,12 @@ class VisualizedBGEEmbedder(Embedder):
         self.model = None
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self._torch = torch
+        # Half-precision inference on GPU (bf16 where supported); weights stay FP32
+        # so image tensors from the preprocessor need no casting. VISUAL_BGE_AUTOCAST=0 disables.
+        self._autocast_dtype = None
+        if self.device.type == "cuda" and os.getenv("VISUAL_BGE_AUTOCAST", "1") != "0":
+            self._autocast_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            print(f"[LOG] Embedding inference will autocast to {self._autocast_dtype}")
         self._loading_lock = False
         # Note: PyTorch models in eval mode can be used concurrently for inference
         # We only lock during model loading, not during inference
@@ -90,7 +101,6 @@ class VisualizedBGEEmbedder(Embedder):
         # If already loading in another thread, wait for it
         if self._loading_lock:
             # Wait a bit for the other thread to finish
-            import time
             max_wait = 300  # 5 minutes max wait
             waited = 0
             while self._loading_lock and waited < max_wait:
@@ -126,7 +136,6 @@ class VisualizedBGEEmbedder(Embedder):
                         print(f"[LOG] ✅ Visualized_BGE initialization completed (model + tokenizer loaded)")
                     except Exception as e:
                         error_container["error"] = e
-                        import traceback
                         error_container["traceback"] = traceback.format_exc()
 
                 loader_thread = threading.Thread(target=load_model)
@@ -165,6 +174,12 @@ class VisualizedBGEEmbedder(Embedder):
             finally:
                 self._loading_lock = False
 
+    def _autocast(self):
+        """Mixed-precision context for inference; no-op on CPU."""
+        if self._autocast_dtype is None:
+            return contextlib.nullcontext()
+        return self._torch.autocast(device_type="cuda", dtype=self._autocast_dtype)
+
     # --------------------------
     # Embed text list
     # --------------------------
@@ -174,7 +189,7 @@ class VisualizedBGEEmbedder(Embedder):
         # Import cancel check function
         from .pipeline import _check_cancel
         
-        with torch.no_grad():
+        with torch.no_grad(), self._autocast():
             # Process each text individually to avoid confusion with image parameter
             embeddings = []
             for idx, text in enumerate(texts):
@@ -189,7 +204,7 @@ class VisualizedBGEEmbedder(Embedder):
                 if isinstance(text, str) and text.strip():
                     # Explicitly pass text parameter, not image
                     emb = self.model.encode(image=None, text=text)
-                    embeddings.append(emb.detach().cpu().numpy().reshape(-1).tolist())
+                    embeddings.append(emb.detach().float().cpu().numpy().reshape(-1).tolist())
                 else:
                     # Handle empty or invalid text
                     print(f"[WARNING] Skipping invalid text: {type(text)} - {text}")
@@ -208,16 +223,11 @@ class VisualizedBGEEmbedder(Embedder):
         # No lock needed - model.encode() is thread-safe for inference
         # Call directly instead of using thread to avoid blocking and allow concurrency
         try:
-            with self._torch.no_grad():
+            with self._torch.no_grad(), self._autocast():
                 if image and text:
                     # Handle base64 data URLs
                     if image.startswith("data:image/"):
                         # Convert base64 data URL to temporary file
-                        import tempfile
-                        import base64
-                        from PIL import Image
-                        import io
-                        
                         # Extract base64 data
                         header, data = image.split(',', 1)
                         img_data = base64.b64decode(data)
@@ -231,7 +241,6 @@ class VisualizedBGEEmbedder(Embedder):
                             emb = self.model.encode(image=tmp_path, text=text)
                         finally:
                             # Clean up temporary file
-                            import os
                             try:
                                 os.unlink(tmp_path)
                             except:
@@ -242,11 +251,6 @@ class VisualizedBGEEmbedder(Embedder):
                     # Handle base64 data URLs
                     if image.startswith("data:image/"):
                         # Convert base64 data URL to temporary file
-                        import tempfile
-                        import base64
-                        from PIL import Image
-                        import io
-                        
                         # Extract base64 data
                         header, data = image.split(',', 1)
                         img_data = base64.b64decode(data)
@@ -260,7 +264,6 @@ class VisualizedBGEEmbedder(Embedder):
                             emb = self.model.encode(image=tmp_path)
                         finally:
                             # Clean up temporary file
-                            import os
                             try:
                                 os.unlink(tmp_path)
                             except:
@@ -269,9 +272,8 @@ class VisualizedBGEEmbedder(Embedder):
                         emb = self.model.encode(image=image)
                 else:
                     emb = self.model.encode(text=text or "")
-                return emb.detach().cpu().numpy().reshape(-1).tolist()
+                return emb.detach().float().cpu().numpy().reshape(-1).tolist()
         except Exception as e:
-            import traceback
             error_traceback = traceback.format_exc()
             print(f"[ERROR] Query encoding failed: {e}")
             print(f"[ERROR] Traceback: {error_traceback}")
@@ -408,7 +410,7 @@ class VisualizedBGEEmbedder(Embedder):
                     # Initialize embeddings list with None to maintain order
                     embs: List[Optional[List[float]]] = [None] * len(batch)
                     
-                    with self._torch.no_grad():
+                    with self._torch.no_grad(), self._autocast():
                         # Separate chunks into text-only and image+text chunks
                         text_only_chunks = []
                         text_only_indices = []
@@ -459,7 +461,7 @@ class VisualizedBGEEmbedder(Embedder):
                             
                             # Single forward pass for all text-only chunks
                             text_embs = self.model.encode_text(tokenized)
-                            text_embs_np = text_embs.detach().cpu().numpy()
+                            text_embs_np = text_embs.detach().float().cpu().numpy()
                             
                             # Store embeddings in correct order
                             for idx, orig_idx in enumerate(text_only_indices):
@@ -534,20 +536,20 @@ class VisualizedBGEEmbedder(Embedder):
                                 
                                 try:
                                     v = self.model.encode(image=largest_image_path, text=text)
-                                    embs[orig_idx] = v.detach().cpu().numpy().reshape(-1).tolist()
+                                    embs[orig_idx] = v.detach().float().cpu().numpy().reshape(-1).tolist()
                                 except Exception as e:
                                     print(f"[WARNING] Failed to encode with image {largest_image_path}: {e}")
                                     # Fallback to text-only if image encoding failed
                                     tokenized = tokenizer([text], return_tensors="pt", padding=True, truncation=True, max_length=512)
                                     tokenized = tokenized.to(self.device)
                                     v = self.model.encode_text(tokenized)
-                                    embs[orig_idx] = v.detach().cpu().numpy()[0].tolist()
+                                    embs[orig_idx] = v.detach().float().cpu().numpy()[0].tolist()
                             else:
                                 # Fallback to text-only if no valid images
                                 tokenized = tokenizer([text], return_tensors="pt", padding=True, truncation=True, max_length=512)
                                 tokenized = tokenized.to(self.device)
                                 v = self.model.encode_text(tokenized)
-                                embs[orig_idx] = v.detach().cpu().numpy()[0].tolist()
+                                embs[orig_idx] = v.detach().float().cpu().numpy()[0].tolist()
                     
                     # Convert to list of lists (remove None values - should not happen, but safety check)
                     return [emb if emb is not None else [0.0] * 1024 for emb in embs]
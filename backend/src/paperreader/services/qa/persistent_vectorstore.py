@@ -12,9 +12,58 @@ import base64
 
 # MongoDB removed
 # from paperreader.database.mongodb import mongodb
-from paperreader.services.qa.vectorstore import InMemoryVectorStore
-from sklearn.feature_extraction.text import TfidfVectorizer
+from paperreader.services.qa.vectorstore import InMemoryVectorStore, top_k_indices
+from scipy.sparse import vstack as sparse_vstack
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.pipeline import make_pipeline
+
+try:
+    import faiss
+
+    HAS_FAISS = True
+except ImportError:
+    HAS_FAISS = False
+
+# HNSW graph degree for the optional FAISS index
+FAISS_HNSW_M = 32
+
+
+# Storage dtype for dense vectors; unit-norm components fit comfortably in float16
+DENSE_DTYPE = np.float16
+
+# Rows upcast to float32 at a time when scoring float16 vectors
+_SCORE_BLOCK_ROWS = 8192
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place so cosine similarity reduces to a dot product"""
+    vectors /= np.linalg.norm(vectors, axis=-1, keepdims=True) + 1e-12
+    return vectors
+
+
+def _dot_scores(vectors: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """Score float16 rows against a float32 query, upcasting one block at a time"""
+    scores = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), _SCORE_BLOCK_ROWS):
+        block = vectors[start:start + _SCORE_BLOCK_ROWS]
+        scores[start:start + len(block)] = block.astype(np.float32) @ query
+    return scores
+
+
+# Stateless term counter: new texts are hashed without refitting a vocabulary
+KEYWORD_HASHER = HashingVectorizer(n_features=2**18, ngram_range=(1, 2), alternate_sign=False, norm=None)
+
+
+def _keyword_index(counts):
+    """Weight hashed term counts by IDF over the whole corpus.
+
+    Refitting the IDF only scans the stored counts, so no text is re-tokenized.
+    Rows come out L2-normalized like TfidfVectorizer output, and the returned
+    pipeline applies the same weighting to queries in keyword_search.
+    """
+    idf = TfidfTransformer().fit(counts)
+    return idf.transform(counts), make_pipeline(KEYWORD_HASHER, idf)
 
 
 class PersistentVectorStore:
@@ -24,6 +73,12 @@ class PersistentVectorStore:
         self.collection_name = collection_name
         self.memory_store = None  # Cache for frequently accessed data
         self.tfidf_vectorizer = None
+        # Optional ANN index over L2-normalized dense vectors (inner product == cosine)
+        self._faiss_index = None
+        # Over-allocated backing array for dense vectors; memory_store.dense_vectors is a view of its filled rows
+        self._dense_buffer: Optional[np.ndarray] = None
+        # Raw hashed term counts, one row per metadata entry; the IDF-weighted matrix is derived from it
+        self._keyword_counts = None
         self._initialized = False
     
     async def initialize(self):
@@ -74,26 +129,15 @@ class PersistentVectorStore:
                 metadatas.append(doc.get("metadata", {}))
         
         if vectors:
-            dense_vectors = np.array(vectors)
+            dense_vectors = _normalize_rows(np.array(vectors, dtype=np.float32)).astype(DENSE_DTYPE)
             
-            # Rebuild TF-IDF matrix
-            texts = [meta.get("text", "") for meta in metadatas]
-            if texts:
-                try:
-                    # Filter out empty texts
-                    non_empty_texts = [text for text in texts if text and text.strip()]
-                    if non_empty_texts:
-                        tfidf_vectorizer = TfidfVectorizer(max_features=50000, ngram_range=(1, 2))
-                        tfidf_matrix = tfidf_vectorizer.fit_transform(non_empty_texts)
-                    else:
-                        print("[WARNING] All texts are empty, skipping TF-IDF")
-                        tfidf_matrix = None
-                        tfidf_vectorizer = None
-                except Exception as e:
-                    print(f"[WARNING] Failed to create TF-IDF matrix: {e}")
-                    tfidf_matrix = None
-                    tfidf_vectorizer = None
-            else:
+            # Build keyword matrix (one row per metadata entry, empty texts hash to zero rows)
+            try:
+                self._keyword_counts = KEYWORD_HASHER.transform([meta.get("text") or "" for meta in metadatas])
+                tfidf_matrix, tfidf_vectorizer = _keyword_index(self._keyword_counts)
+            except Exception as e:
+                print(f"[WARNING] Failed to create keyword matrix: {e}")
+                self._keyword_counts = None
                 tfidf_matrix = None
                 tfidf_vectorizer = None
             
@@ -153,45 +197,85 @@ class PersistentVectorStore:
         if not self.memory_store:
             await self.initialize()
         
-        # Convert to numpy arrays
-        new_vectors = np.array(embeddings)
+        # Convert to numpy arrays, normalized once here instead of on every search
+        # (in float32, then stored as float16 to halve memory and scan bandwidth)
+        new_vectors = _normalize_rows(np.array(embeddings, dtype=np.float32)).astype(DENSE_DTYPE)
         
         if self.memory_store.dense_vectors.size == 0:
             # First embeddings
-            self.memory_store.dense_vectors = new_vectors
             self.memory_store.metadatas = metadatas
         else:
             # Append to existing
-            self.memory_store.dense_vectors = np.vstack([
-                self.memory_store.dense_vectors, 
-                new_vectors
-            ])
             self.memory_store.metadatas.extend(metadatas)
+        self.memory_store.dense_vectors = self._append_dense(new_vectors)
         
-        # Update TF-IDF matrix
-        all_texts = [meta.get("text", "") for meta in self.memory_store.metadatas]
-        if all_texts:
-            try:
-                # Filter out empty texts
-                non_empty_texts = [text for text in all_texts if text and text.strip()]
-                if non_empty_texts:
-                    tfidf_vectorizer = TfidfVectorizer(max_features=50000, ngram_range=(1, 2))
-                    self.memory_store.tfidf_matrix = tfidf_vectorizer.fit_transform(non_empty_texts)
-                    self.memory_store.tfidf_vectorizer = tfidf_vectorizer
-                else:
-                    print("[WARNING] All texts are empty, skipping TF-IDF update")
-                    self.memory_store.tfidf_matrix = None
-                    self.memory_store.tfidf_vectorizer = None
-            except Exception as e:
-                print(f"[WARNING] Failed to update TF-IDF matrix: {e}")
-                self.memory_store.tfidf_matrix = None
-                self.memory_store.tfidf_vectorizer = None
+        if HAS_FAISS:
+            self._update_faiss_index(new_vectors)
+        
+        # Update keyword matrix: hash only the new texts, append their counts and reweight by IDF
+        try:
+            store = self.memory_store
+            counts = self._keyword_counts
+            if counts is not None and counts.shape[0] + len(metadatas) == len(store.metadatas):
+                new_rows = KEYWORD_HASHER.transform([meta.get("text") or "" for meta in metadatas])
+                counts = sparse_vstack([counts, new_rows], format="csr")
+            else:
+                counts = KEYWORD_HASHER.transform([meta.get("text") or "" for meta in store.metadatas])
+            self._keyword_counts = counts
+            store.tfidf_matrix, store.tfidf_vectorizer = _keyword_index(counts)
+        except Exception as e:
+            print(f"[WARNING] Failed to update keyword matrix: {e}")
+            self._keyword_counts = None
+            self.memory_store.tfidf_matrix = None
+            self.memory_store.tfidf_vectorizer = None
+    
+    def _append_dense(self, new_vectors: np.ndarray) -> np.ndarray:
+        """Append rows into the capacity-doubling buffer and return a view of the filled rows"""
+        current = self.memory_store.dense_vectors
+        size = len(current) if current.size else 0
+        needed = size + len(new_vectors)
+        buffer = self._dense_buffer
+        
+        # Grow (amortized O(1) per row) when out of room, or when dense_vectors is no longer our view
+        if buffer is None or current.base is not buffer or needed > len(buffer):
+            capacity = max(2 * len(buffer) if buffer is not None else 0, needed)
+            grown = np.empty((capacity, new_vectors.shape[1]), dtype=DENSE_DTYPE)
+            if size:
+                grown[:size] = current
+            buffer = self._dense_buffer = grown
+        
+        buffer[size:needed] = new_vectors
+        return buffer[:needed]
+    
+    def _update_faiss_index(self, new_vectors: np.ndarray):
+        """Add new vectors to the FAISS HNSW index, building it on first use"""
+        try:
+            # Stored vectors are already L2-normalized
+            if self._faiss_index is None:
+                # Index everything held so far (new_vectors are already in dense_vectors)
+                vectors = np.ascontiguousarray(self.memory_store.dense_vectors, dtype=np.float32)
+                self._faiss_index = faiss.IndexHNSWFlat(vectors.shape[1], FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            else:
+                vectors = np.ascontiguousarray(new_vectors, dtype=np.float32)
+            self._faiss_index.add(vectors)
+        except Exception as e:
+            print(f"[WARNING] Failed to update FAISS index, falling back to exact search: {e}")
+            self._faiss_index = None
     
     def dense_search(self, query_vec: np.ndarray, top_k: int = 5) -> List[Tuple[int, float]]:
-        """Search using dense similarity"""
+        """Search using dense similarity (FAISS HNSW when available, exact scan otherwise)"""
         if not self.memory_store or self.memory_store.dense_vectors.size == 0:
             return []
-        return self.memory_store.dense_search(query_vec, top_k)
+        dense_vectors = self.memory_store.dense_vectors
+        query = _normalize_rows(np.array(query_vec, dtype=np.float32).reshape(1, -1))
+        index = self._faiss_index
+        if index is not None and index.ntotal == len(dense_vectors):
+            scores, idxs = index.search(query, top_k)
+            return [(int(i), float(score)) for i, score in zip(idxs[0], scores[0]) if i != -1]
+        
+        # Exact search: one matrix-vector product, then partial top-k selection
+        scores = _dot_scores(dense_vectors, query[0])
+        return [(int(i), float(scores[i])) for i in top_k_indices(scores, top_k)]
     
     def keyword_search(self, query: str, top_k: int = 5, generated_keywords: List[str] = None) -> List[Tuple[int, float]]:
         """Search using keyword similarity"""
@@ -218,6 +302,9 @@ class PersistentVectorStore:
         count = await self.get_embedding_count()
         
         # Reset memory cache
+        self._faiss_index = None
+        self._dense_buffer = None
+        self._keyword_counts = None
         self.memory_store = InMemoryVectorStore(
             dense_vectors=np.empty((0, 0)),
             metadatas=[],
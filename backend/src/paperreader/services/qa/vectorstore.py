@@ -72,6 +72,18 @@ def gpt_generate_keywords(query: str, max_keywords: int = 5) -> List[str]:
         return [query]
 
 
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top_k highest scores, best first.
+
+    Partitions in O(N) and sorts only the selected k instead of the whole array.
+    """
+    k = min(top_k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    idxs = np.argpartition(-scores, k - 1)[:k]
+    return idxs[np.argsort(-scores[idxs])]
+
+
 class InMemoryVectorStore:
     def __init__(
         self,
@@ -93,7 +105,7 @@ class InMemoryVectorStore:
             print(f"[WARNING] Dense vectors is empty!")
             return []
         sims = cosine_similarity(query_vec.reshape(1, -1), self.dense_vectors)[0]
-        idxs = np.argsort(-sims)[:top_k]
+        idxs = top_k_indices(sims, top_k)
         print(f"[DEBUG] Dense search sims: {[(i, float(sims[i])) for i in idxs]}")
         return [(int(i), float(sims[i])) for i in idxs]
 
@@ -115,7 +127,7 @@ class InMemoryVectorStore:
             sims_total += sims
             print(f"[DEBUG] Keyword '{kw}' sims: {sims}")
 
-        idxs = np.argsort(-sims_total)[:top_k]
+        idxs = top_k_indices(sims_total, top_k)
         result = [(int(i), float(sims_total[i])) for i in idxs]
         print(f"[DEBUG] Keyword search top-{top_k}: {result}")
         return result
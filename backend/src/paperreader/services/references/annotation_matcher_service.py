@@ -5,8 +5,9 @@ This service links citation annotations (extracted from PDF links) with
 reference metadata (extracted via GROBID) using spatial proximity matching.
 """
 
-import math
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from paperreader.models.reference import ReferenceSchema
 
@@ -58,6 +59,7 @@ class AnnotationMatcherService:
             ]
         """
         enriched_results = []
+        anchor_index = self._build_anchor_index(references)
 
         for page_data in annotations:
             updated_annotations = []
@@ -71,7 +73,9 @@ class AnnotationMatcherService:
                     continue
 
                 # Find closest matching reference
-                matched_ref = self._find_closest_reference(target, references)
+                matched_ref = self._find_closest_reference(
+                    target, references, anchor_index
+                )
 
                 # Attach metadata if match found
                 if matched_ref:
@@ -85,10 +89,35 @@ class AnnotationMatcherService:
 
         return enriched_results
 
+    @staticmethod
+    def _build_anchor_index(
+        references: List[ReferenceSchema],
+    ) -> Tuple[List[ReferenceSchema], np.ndarray]:
+        """
+        Pack each reference's anchor box into a structure-of-arrays index.
+
+        Args:
+            references: List of reference schemas
+
+        Returns:
+            Tuple of (references that have a bounding box, array of shape
+            (N, 3) holding page, left, top of each reference's first box)
+        """
+        anchored = [ref for ref in references if ref.bib_location]
+        anchors = np.array(
+            [
+                (ref.bib_location[0].page, ref.bib_location[0].left, ref.bib_location[0].top)
+                for ref in anchored
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 3)
+        return anchored, anchors
+
     def _find_closest_reference(
         self,
         target: Dict[str, Any],
         references: List[ReferenceSchema],
+        anchor_index: Optional[Tuple[List[ReferenceSchema], np.ndarray]] = None,
     ) -> Optional[ReferenceSchema]:
         """
         Find the closest reference to the target location.
@@ -96,54 +125,34 @@ class AnnotationMatcherService:
         Args:
             target: Target location dict with page, x, y
             references: List of reference schemas
+            anchor_index: Optional prebuilt index from _build_anchor_index,
+                reused across targets to avoid repacking the boxes
 
         Returns:
             Closest matching reference or None
         """
-        closest_ref = None
-        min_distance = float("inf")
+        anchored, anchors = anchor_index or self._build_anchor_index(references)
         target_page = target["page"]
         target_x = target["x"]
         target_y = 1 - target["y"]
 
-        for ref in references:
-            if not ref.bib_location:
-                continue
+        # Use first bounding box as anchor point, matching by page number first
+        candidates = np.flatnonzero(anchors[:, 0] == target_page)
+        if candidates.size == 0:
+            return None
 
-            # Use first bounding box as anchor point
-            first_box = ref.bib_location[0]
-
-            # Match by page number first
-            if first_box.page == target_page:
-                # Calculate Euclidean distance
-                distance = self._calculate_distance(
-                    target_x, target_y, first_box.left, first_box.top
-                )
-
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_ref = ref
+        # Euclidean distance to every candidate anchor at once
+        distances = np.hypot(
+            anchors[candidates, 1] - target_x, anchors[candidates, 2] - target_y
+        )
+        best = int(np.argmin(distances))
 
         # Only return if within threshold
-        if closest_ref and min_distance < self.distance_threshold:
-            return closest_ref
+        if distances[best] < self.distance_threshold:
+            return anchored[int(candidates[best])]
 
         return None
 
-    @staticmethod
-    def _calculate_distance(x1: float, y1: float, x2: float, y2: float) -> float:
-        """
-        Calculate Euclidean distance between two points.
-
-        Args:
-            x1, y1: First point coordinates
-            x2, y2: Second point coordinates
-
-        Returns:
-            Euclidean distance
-        """
-        return math.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-
     @staticmethod
     def _extract_metadata(reference: ReferenceSchema) -> Dict[str, Any]:
         """
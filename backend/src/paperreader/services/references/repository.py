@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from bson import ObjectId
@@ -16,8 +16,9 @@ async def create_reference(reference: ReferenceCreate) -> ReferenceSchema:
     collection = mongodb.database["references"]
 
     reference_dict = reference.model_dump()
-    reference_dict["created_at"] = datetime.utcnow()
-    reference_dict["updated_at"] = datetime.utcnow()
+    now = datetime.now(timezone.utc)
+    reference_dict["created_at"] = now
+    reference_dict["updated_at"] = now
 
     result = await collection.insert_one(reference_dict)
     created_reference = await collection.find_one({"_id": result.inserted_id})
@@ -25,14 +26,12 @@ async def create_reference(reference: ReferenceCreate) -> ReferenceSchema:
     return ReferenceSchema.from_mongo(created_reference)
 
 
-async def create_references_batch(
+def _reference_docs(
     document_id: str, references: List[ReferenceCreate]
-) -> List[ReferenceSchema]:
-    """Create multiple references in batch."""
-    collection = mongodb.database["references"]
-
-    now = datetime.utcnow()
-    reference_dicts = [
+) -> List[Dict[str, Any]]:
+    """Build insert-ready reference documents with a shared timestamp."""
+    now = datetime.now(timezone.utc)
+    return [
         {
             **ref.model_dump(),
             "document_id": document_id,
@@ -42,17 +41,25 @@ async def create_references_batch(
         for ref in references
     ]
 
+
+async def create_references_batch(
+    document_id: str, references: List[ReferenceCreate]
+) -> List[ReferenceSchema]:
+    """Create multiple references in batch.
+
+    insert_many assigns ``_id`` on the documents it was given, so the
+    returned schemas are built from those instead of re-reading the batch.
+    """
+    collection = mongodb.database["references"]
+
+    reference_dicts = _reference_docs(document_id, references)
+
     if not reference_dicts:
         return []
 
-    result = await collection.insert_many(reference_dicts)
-
-    # Fetch created references
-    created_refs = await collection.find({"_id": {"$in": result.inserted_ids}}).to_list(
-        length=len(result.inserted_ids)
-    )
+    await collection.insert_many(reference_dicts, ordered=False)
 
-    return [ReferenceSchema.from_mongo(ref) for ref in created_refs]
+    return [ReferenceSchema.from_mongo(ref) for ref in reference_dicts]
 
 
 async def get_reference_by_id(reference_id: str) -> Optional[ReferenceSchema]:
@@ -114,7 +121,7 @@ async def update_reference(
     if not update_dict:
         return await get_reference_by_id(reference_id)
 
-    update_dict["updated_at"] = datetime.utcnow()
+    update_dict["updated_at"] = datetime.now(timezone.utc)
 
     result = await collection.find_one_and_update(
         {"_id": ObjectId(reference_id)}, {"$set": update_dict}, return_document=True
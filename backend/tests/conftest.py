@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The backend runs with src/ on PYTHONPATH (see backend/Dockerfile)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
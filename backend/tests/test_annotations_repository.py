@@ -0,0 +1,112 @@
+import asyncio
+import copy
+
+import pytest
+
+pytest.importorskip("motor")
+
+from bson import ObjectId
+
+from paperreader.services.annotations import repository
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeAnnotations:
+    """The subset of user_annotations used by the single-annotation paths."""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs[doc["_id"]] = copy.deepcopy(doc)
+        return _Result(inserted_ids=[doc["_id"] for doc in docs])
+
+    def _owned(self, query):
+        doc = self.docs.get(query["_id"])
+        return doc if doc is not None and doc["user_id"] == query["user_id"] else None
+
+    async def find_one(self, query, projection=None):
+        doc = self._owned(query)
+        if doc is None:
+            return None
+        return copy.deepcopy(
+            {key: value for key, value in doc.items() if key == "_id" or not projection or key in projection}
+        )
+
+    async def update_one(self, query, update):
+        doc = self._owned(query)
+        if doc is None:
+            return _Result(matched_count=0, modified_count=0)
+        doc.update(copy.deepcopy(update["$set"]))
+        return _Result(matched_count=1, modified_count=1)
+
+
+@pytest.fixture
+def annotations(monkeypatch):
+    collection = FakeAnnotations()
+    monkeypatch.setattr(repository, "_collection", collection)
+    return collection
+
+
+AREAS = [
+    {"left": 10.5, "top": 20.25, "width": 30.125, "height": 4.75, "pageIndex": 2},
+    {"left": 0.1, "top": 99.9, "width": 12.0, "height": 1.3, "pageIndex": 3},
+]
+
+
+def _save(document_id: str, highlight_areas=AREAS) -> str:
+    return asyncio.run(
+        repository.save_user_annotation(
+            user_id="u1",
+            document_id=document_id,
+            content="note",
+            highlight_areas=highlight_areas,
+            quote="quoted text",
+            page_index=2,
+        )
+    )
+
+
+def test_highlight_areas_round_trip_as_a_list(annotations):
+    document_id = str(ObjectId())
+
+    annotation_id = _save(document_id)
+    stored = annotations.docs[ObjectId(annotation_id)]
+    loaded = asyncio.run(repository.get_user_annotation_by_id(annotation_id, "u1"))
+
+    assert stored["highlight_areas"] == AREAS
+    assert loaded["highlight_areas"] == AREAS
+    assert loaded["_id"] == annotation_id
+    assert loaded["document_id"] == document_id
+    assert loaded["color"] == "#ffff00"
+
+
+def test_updated_highlight_areas_round_trip(annotations):
+    annotation_id = _save(str(ObjectId()))
+    new_areas = [{"left": 1.0, "top": 2.0, "width": 3.0, "height": 4.0, "pageIndex": 0}]
+
+    updated = asyncio.run(
+        repository.update_user_annotation(annotation_id, "u1", highlight_areas=new_areas)
+    )
+    loaded = asyncio.run(repository.get_user_annotation_by_id(annotation_id, "u1"))
+
+    assert updated is True
+    assert loaded["highlight_areas"] == new_areas
+
+
+def test_annotation_read_is_scoped_to_owner(annotations):
+    annotation_id = _save(str(ObjectId()))
+
+    assert asyncio.run(repository.get_user_annotation_by_id(annotation_id, "someone-else")) is None
+
+
+def test_save_rejects_invalid_document_id(annotations):
+    with pytest.raises(ValueError):
+        _save("not-an-object-id")
+    assert annotations.docs == {}
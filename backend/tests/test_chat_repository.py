@@ -0,0 +1,96 @@
+import asyncio
+import copy
+
+import pytest
+
+pytest.importorskip("motor")
+
+from bson import ObjectId
+
+from paperreader.services.chat import repository
+
+
+class _Result:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class FakeMessages:
+    """The subset of chat_messages used by the append paths."""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_many(self, docs, ordered=True):
+        # Like pymongo, assign _id on the caller's documents
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs[doc["_id"]] = copy.deepcopy(doc)
+        return _Result(inserted_ids=[doc["_id"] for doc in docs])
+
+    async def delete_many(self, query):
+        ids = query["_id"]["$in"]
+        deleted = sum(self.docs.pop(_id, None) is not None for _id in ids)
+        return _Result(deleted_count=deleted)
+
+
+class FakeSessions:
+    """Session headers keyed by session_id, supporting the append-time touch."""
+
+    def __init__(self, *session_ids):
+        self.headers = {session_id: {"message_count": 0} for session_id in session_ids}
+
+    async def update_one(self, query, update):
+        header = self.headers.get(query["session_id"])
+        if header is None:
+            return _Result(matched_count=0, modified_count=0)
+        header.update(update.get("$set", {}))
+        for field, amount in update.get("$inc", {}).items():
+            header[field] = header.get(field, 0) + amount
+        return _Result(matched_count=1, modified_count=1)
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    sessions, messages = FakeSessions("s1"), FakeMessages()
+    monkeypatch.setattr(repository, "_sessions_collection", lambda: sessions)
+    monkeypatch.setattr(repository, "_messages_collection", lambda: messages)
+    return sessions, messages
+
+
+EXCHANGE = [
+    {"role": "user", "content": "What is attention?"},
+    {"role": "assistant", "content": "A weighting over inputs.", "metadata": {"confidence": 0.9}},
+]
+
+
+def test_append_messages_bulk_rolls_back_for_missing_session(collections):
+    sessions, messages = collections
+
+    result = asyncio.run(repository.append_messages_bulk("missing", EXCHANGE))
+
+    assert result is None
+    assert messages.docs == {}
+    assert "missing" not in sessions.headers
+
+
+def test_append_messages_bulk_stores_ordered_batch_and_counts_it(collections):
+    sessions, messages = collections
+
+    docs = asyncio.run(repository.append_messages_bulk("s1", EXCHANGE))
+
+    assert [doc["role"] for doc in docs] == ["user", "assistant"]
+    assert docs[0]["created_at"] < docs[1]["created_at"]
+    assert all(isinstance(doc["_id"], str) for doc in docs)
+    assert docs[0]["metadata"] == {}
+    assert len(messages.docs) == 2
+    assert sessions.headers["s1"]["message_count"] == 2
+    assert sessions.headers["s1"]["updated_at"] == docs[-1]["created_at"]
+
+
+def test_append_messages_bulk_empty_batch_is_a_no_op(collections):
+    sessions, messages = collections
+
+    assert asyncio.run(repository.append_messages_bulk("s1", [])) == []
+    assert messages.docs == {}
+    assert sessions.headers["s1"] == {"message_count": 0}
@@ -0,0 +1,71 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+pytest.importorskip("sklearn")
+pytest.importorskip("dotenv")
+
+from paperreader.services.qa.persistent_vectorstore import DENSE_DTYPE, PersistentVectorStore
+from paperreader.services.qa.vectorstore import InMemoryVectorStore
+
+
+def _rows(count: int, start: float, dim: int = 4) -> np.ndarray:
+    """Rows whose values are exact in float16: row i is filled with start + i."""
+    return np.repeat(np.arange(start, start + count, dtype=DENSE_DTYPE)[:, None], dim, axis=1)
+
+
+@pytest.fixture
+def store() -> PersistentVectorStore:
+    store = PersistentVectorStore()
+    store.memory_store = InMemoryVectorStore(dense_vectors=np.empty((0, 0)), metadatas=[])
+    return store
+
+
+def _append(store: PersistentVectorStore, rows: np.ndarray) -> np.ndarray:
+    store.memory_store.dense_vectors = store._append_dense(rows)
+    return store.memory_store.dense_vectors
+
+
+def test_append_dense_first_batch_is_a_view_of_the_buffer(store):
+    dense = _append(store, _rows(3, 0))
+
+    assert dense.shape == (3, 4)
+    assert dense.dtype == DENSE_DTYPE
+    assert dense.base is store._dense_buffer
+    assert len(store._dense_buffer) == 3
+
+
+def test_append_dense_doubles_capacity_and_keeps_rows(store):
+    _append(store, _rows(3, 0))
+    dense = _append(store, _rows(2, 3))
+
+    assert len(store._dense_buffer) == 6
+    assert dense.base is store._dense_buffer
+    np.testing.assert_array_equal(dense, _rows(5, 0))
+
+
+def test_append_dense_fills_spare_capacity_in_place(store):
+    _append(store, _rows(3, 0))
+    _append(store, _rows(2, 3))
+    buffer = store._dense_buffer
+
+    dense = _append(store, _rows(1, 5))
+
+    assert store._dense_buffer is buffer
+    assert dense.base is buffer
+    np.testing.assert_array_equal(dense, _rows(6, 0))
+
+
+def test_append_dense_regrows_when_dense_vectors_was_replaced(store):
+    _append(store, _rows(3, 0))
+    _append(store, _rows(2, 3))
+    old_buffer = store._dense_buffer
+    # A caller swapping in its own array must not see later appends written
+    # into the old buffer behind its back
+    store.memory_store.dense_vectors = _rows(2, 10)
+
+    dense = _append(store, _rows(1, 12))
+
+    assert store._dense_buffer is not old_buffer
+    assert dense.base is store._dense_buffer
+    np.testing.assert_array_equal(dense, _rows(3, 10))
@@ -0,0 +1,28 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("dotenv")
+
+from paperreader.services.qa.vectorstore import top_k_indices
+
+
+def test_top_k_indices_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7, 0.3])
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+
+
+def test_top_k_indices_matches_full_sort():
+    scores = np.random.default_rng(0).permutation(1000).astype(np.float32)
+    expected = np.argsort(-scores)[:25]
+    assert top_k_indices(scores, 25).tolist() == expected.tolist()
+
+
+def test_top_k_indices_k_larger_than_scores():
+    scores = np.array([0.2, 0.8, 0.5])
+    assert top_k_indices(scores, 10).tolist() == [1, 2, 0]
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_top_k_indices_empty_for_non_positive_k(top_k):
+    assert top_k_indices(np.array([0.2, 0.8]), top_k).size == 0